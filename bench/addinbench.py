@@ -0,0 +1,288 @@
+'''
+Calc Add-In Function Benchmark
+
+This Python script measures the functions of an add-in outside LibreOffice.
+The stand-in uno and unohelper modules in the standin directory let the
+add-in's source be imported.  The add-in is created with its createInstance
+function, or else by its implementation name as registered with its
+g_ImplementationHelper, just as LibreOffice would.
+
+Every function capp.py finds is called again and again, for a while, with
+argument sets made up to match its idl: signature:  integers from 1 to 1000,
+floating point numbers from 0 to 1, strings of eight letters, booleans and,
+for any, any of these or None.  A sequence of sequences is a range of rows
+and columns of them.  The arguments are made up from a seed, so every run
+calls the functions with the same arguments.  For each function the script
+reports:
+    calls/s  - the rate at which the function is called
+    mean     - the time one call takes on average
+    peak     - the peak memory allocated by one pass over the argument sets
+    blocks   - the memory blocks still allocated afterwards, per call, which
+               should be 0 for a function that does not keep what it makes
+    errors   - the number of calls that raised an exception
+
+The script takes the add-in class name and the add-in's source file, as
+capp.py does, and the options:
+    --capp path      - the capp.py with which to find the functions (default: python3/capp.py)
+    --methods name,... - the functions to measure (default: all)
+    --skip name,...  - the functions not to measure
+    --sets n         - the number of argument sets made up for each function (default: 100)
+    --rows n         - the rows of a range (default: 10)
+    --columns n      - the columns of a range (default: 10)
+    --seed n         - the seed from which arguments are made up (default: 0)
+    --time seconds   - how long each function is called for (default: 0.2)
+    --wired          - wire the add-in up as packaging does, for cache: and async: functions
+    --save path      - save the results as a baseline
+    --compare path   - compare the results with a baseline
+    --tolerance x    - how many times slower than the baseline is a regression (default: 1.5)
+The exit status is 1 if a regression is found.  Eg:
+
+    python3 bench/addinbench.py DoobieDoo python3/doobiedoo.py --skip doobieLater
+
+Functions with arguments of interface types, such as XCellRange, cannot be
+called and are reported as such.  Wired async: functions return at once,
+so what is measured is only the cost of handing the call to a thread.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, gc, getopt, json, platform, random, re, string, timeit, types
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(here,'standin'))
+
+import uno
+from cappbench import loadCapp
+
+'''
+The IDL types of which arguments are made up
+'''
+_integers = set(['byte', 'short', 'unsigned short', 'long', 'unsigned long', 'hyper', 'unsigned hyper'])
+_floats   = set(['float', 'double'])
+_sequence = re.compile(r'^sequence<(.*)>$')
+
+def argument(idlType,generator,rows,columns):
+    '''
+    make up an argument of the given, normalised, IDL type
+    '''
+    if idlType in _integers:
+        return generator.randint(1,1000)
+    if idlType in _floats:
+        return generator.random()
+    if idlType == 'string':
+        return ''.join(generator.choice(string.ascii_letters) for dummy in range(8))
+    if idlType == 'boolean':
+        return generator.random() < 0.5
+    if idlType == 'any':
+        return generator.choice([generator.random(), argument('string',generator,rows,columns), None])
+
+    result = _sequence.match(idlType)
+    if result:
+        inner = _sequence.match(result.group(1))
+        if inner:
+            return tuple(tuple(argument(inner.group(1),generator,rows,columns) for dummy in range(columns)) for dummy in range(rows))
+        return tuple(argument(result.group(1),generator,rows,columns) for dummy in range(columns))
+
+    raise ValueError('I cannot make up a "%s" argument' % idlType)
+
+def loadAddIn(sourcePath,wiring=''):
+    '''
+    import the add-in's source as a module, with any wiring appended
+    '''
+    name = os.path.splitext(os.path.basename(sourcePath))[0]
+    with open(sourcePath,"r") as input:
+        source = input.read()
+    module = types.ModuleType(name)
+    module.__file__ = os.path.abspath(sourcePath)
+    sys.modules[name] = module
+    exec(compile(source + '\n' + wiring,sourcePath,'exec'),module.__dict__)
+    return module
+
+def createAddIn(module,addIn):
+    '''
+    create an instance of the add-in as LibreOffice would
+    '''
+    ctx = uno.getComponentContext()
+    if hasattr(module,'createInstance'):
+        return module.createInstance(ctx)
+    return module.g_ImplementationHelper.createInstance(addIn.unoComponentId,ctx)
+
+def measure(function,sets,duration):
+    '''
+    call the function with the argument sets, in turn, for the given duration
+    '''
+    calls = 0
+    errors = []
+    start = timeit.default_timer()
+    elapsed = 0.0
+    while calls == 0 or elapsed < duration:
+        try:
+            function(*sets[calls % len(sets)])
+        except Exception as error:
+            errors.append(error)
+        calls += 1
+        elapsed = timeit.default_timer() - start
+
+    result = {
+        'calls'          : calls,
+        'callsPerSecond' : calls / elapsed,
+        'mean'           : elapsed / calls,
+        'errors'         : len(errors),
+        'error'          : '%s: %s' % (type(errors[0]).__name__, errors[0]) if errors else '',
+    }
+
+    count = min(calls,len(sets))
+    gc.collect()
+    blocks = sys.getallocatedblocks() if hasattr(sys,'getallocatedblocks') else 0
+    if tracemalloc:
+        tracemalloc.start()
+    for index in range(count):
+        try:
+            function(*sets[index])
+        except Exception:
+            pass
+    if tracemalloc:
+        result['peak'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        result['peak'] = 0
+    gc.collect()
+    result['blocks'] = float((sys.getallocatedblocks() if blocks else 0) - blocks) / count
+    return result
+
+def report(results,baseline,tolerance):
+    '''
+    print the results, comparing them with the baseline if there is one
+
+    Returns the number of regressions.
+    '''
+    regressions = 0
+    print ('%-24s %10s %12s %10s %10s %8s %7s' % ('function', 'calls', 'calls/s', 'mean', 'peak', 'blocks', 'errors'))
+    for name, result in results:
+        if 'skipped' in result:
+            print ('%-24s %s' % (name, result['skipped']))
+            continue
+        print ('%-24s %10d %12.0f %8.2fus %9.1fK %8.1f %7d' % (name, result['calls'], result['callsPerSecond'],
+               result['mean'] * 1000000, result['peak'] / 1024.0, result['blocks'], result['errors']))
+        if result['error']:
+            print ('%-24s first error - %s' % ('', result['error']))
+        if baseline:
+            previous = baseline.get(name)
+            if previous and 'callsPerSecond' in previous:
+                if result['callsPerSecond'] * tolerance < previous['callsPerSecond']:
+                    print ('%-24s regression: %.0f calls/s against a baseline of %.0f' % ('', result['callsPerSecond'], previous['callsPerSecond']))
+                    regressions += 1
+    return regressions
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    capp = os.path.join(here, '..', 'python3', 'capp.py')
+    methods = None
+    skip = []
+    sets = 100
+    rows = 10
+    columns = 10
+    seed = 0
+    duration = 0.2
+    wired = False
+    save = None
+    compare = None
+    tolerance = 1.5
+
+    try:
+        options, arguments = getopt.gnu_getopt(argv[1:], '', ['capp=', 'methods=', 'skip=', 'sets=', 'rows=', 'columns=', 'seed=', 'time=', 'wired', 'save=', 'compare=', 'tolerance='])
+    except getopt.GetoptError as error:
+        print ("I do not understand my options - " + str(error))
+        return 1
+
+    for option, value in options:
+        if option == '--capp':
+            capp = value
+        elif option == '--methods':
+            methods = value.split(',')
+        elif option == '--skip':
+            skip = value.split(',')
+        elif option == '--sets':
+            sets = int(value)
+        elif option == '--rows':
+            rows = int(value)
+        elif option == '--columns':
+            columns = int(value)
+        elif option == '--seed':
+            seed = int(value)
+        elif option == '--time':
+            duration = float(value)
+        elif option == '--wired':
+            wired = True
+        elif option == '--save':
+            save = value
+        elif option == '--compare':
+            compare = value
+        elif option == '--tolerance':
+            tolerance = float(value)
+
+    if len(arguments) != 2:
+        print ("I need to know what to measure - my arguments are the add-in class name and the path to its source")
+        return 1
+
+    moduleName, sourcePath = arguments
+
+    capp = loadCapp(capp)
+    addIn = capp.processFile(sourcePath,moduleName)
+    if addIn is None:
+        print ("I cannot find the add-in " + moduleName + " in " + sourcePath)
+        return 1
+
+    baseline = None
+    if compare:
+        with open(compare,"r") as input:
+            baseline = json.load(input)['results']
+
+    module = loadAddIn(sourcePath,capp.wiring(addIn) if wired else '')
+    instance = createAddIn(module,addIn)
+
+    print ('%s in %s%s under Python %s' % (moduleName, os.path.normpath(sourcePath), ' (wired)' if wired else '', platform.python_version()))
+    generator = random.Random(seed)
+    results = []
+    for method in addIn.methods:
+        if methods is not None and not method.name in methods or method.name in skip:
+            continue
+        signature = capp.parseSignature(method.idlSignature[0]) if method.idlSignature else None
+        if signature is None:
+            results.append((method.name, {'skipped': 'skipped - it has no IDL signature I understand'}))
+            continue
+        try:
+            argumentSets = [tuple(argument(parameter[1],generator,rows,columns) for parameter in signature[2]) for dummy in range(sets)]
+        except ValueError as error:
+            results.append((method.name, {'skipped': 'skipped - ' + str(error)}))
+            continue
+        results.append((method.name, measure(getattr(instance,method.name),argumentSets,duration)))
+
+    regressions = report(results,baseline,tolerance)
+
+    if save:
+        with open(save,"w") as output:
+            json.dump({
+                'python'  : platform.python_version(),
+                'addIn'   : moduleName,
+                'seed'    : seed,
+                'results' : dict(results),
+            }, output, indent=4, sort_keys=True)
+            output.write('\n')
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
@@ -0,0 +1,160 @@
+'''
+Calc Add-In Call Replay
+
+This Python script replays the calls to an add-in recorded by capprecord.py
+(see capp.py --record) against the add-in outside LibreOffice, using the
+stand-in uno and unohelper modules, as addinbench.py does.  Real workbooks
+may so be used to tune an add-in's functions and to check that changes to
+them do not change their results.
+
+The calls are replayed in the order they were recorded.  A call whose result
+differs from that recorded, or which raises a different exception, or none,
+is a mismatch.  Results recorded only by their repr, such as those of async:
+functions, are not compared, and calls whose arguments were recorded only by
+their repr, such as cell ranges, cannot be replayed and are skipped.  For
+each function the script reports:
+    calls      - the number of calls replayed
+    recorded   - the time one call took on average in LibreOffice
+    replayed   - the time one call took on average when replayed
+    mismatches - the number of calls whose results differed
+    skipped    - the number of calls that could not be replayed
+
+The script takes the log, the add-in class name and the add-in's source file
+and the options:
+    --capp path        - the capp.py with which to find the add-in (default: python3/capp.py)
+    --methods name,... - the functions whose calls to replay (default: all)
+    --repeat n         - replay the calls n times, for steadier timings (default: 1)
+    --wired            - wire the add-in up as packaging does, for cache: and async: functions
+    --show n           - show the first n mismatches (default: 5)
+The exit status is 1 if there are any mismatches.  Eg:
+
+    CAPP_RECORD=/tmp/calls.log soffice workbook.ods
+    python3 bench/addinreplay.py /tmp/calls.log DoobieDoo python3/doobiedoo.py
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, getopt, timeit
+
+from addinbench import here, loadAddIn, createAddIn
+from cappbench import loadCapp
+
+def replay(instance,calls,repeat):
+    '''
+    replay the calls against the instance of the add-in
+
+    Returns the statistics of each function by name and the mismatches found.
+    '''
+    import capprecord
+
+    functions  = {}
+    mismatches = []
+    for call in calls:
+        counts = functions.setdefault(call.name,{'calls': 0, 'recorded': 0.0, 'replayed': 0.0, 'mismatches': 0, 'skipped': 0})
+        if not capprecord.replayable(call.args):
+            counts['skipped'] += 1
+            continue
+
+        function = getattr(instance,call.name)
+        arguments = call.arguments()
+        for index in range(repeat):
+            raised = 0
+            start = timeit.default_timer()
+            try:
+                result = function(*arguments)
+            except Exception as error:
+                result = type(error).__name__ + ': ' + str(error)
+                raised = 1
+            counts['replayed'] += timeit.default_timer() - start
+
+        counts['calls'] += 1
+        counts['recorded'] += call.duration
+
+        if not capprecord.replayable(call.result):
+            continue
+        if raised != call.raised or bytes(capprecord.encode(result,bytearray())) != bytes(call.result):
+            counts['mismatches'] += 1
+            mismatches.append((call, arguments, result))
+
+    return functions, mismatches
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    capp = os.path.join(here, '..', 'python3', 'capp.py')
+    methods = None
+    repeat = 1
+    wired = False
+    show = 5
+
+    try:
+        options, arguments = getopt.gnu_getopt(argv[1:], '', ['capp=', 'methods=', 'repeat=', 'wired', 'show='])
+    except getopt.GetoptError as error:
+        print ("I do not understand my options - " + str(error))
+        return 1
+
+    for option, value in options:
+        if option == '--capp':
+            capp = value
+        elif option == '--methods':
+            methods = value.split(',')
+        elif option == '--repeat':
+            repeat = int(value)
+        elif option == '--wired':
+            wired = True
+        elif option == '--show':
+            show = int(value)
+
+    if len(arguments) != 3:
+        print ("I need to know what to replay - my arguments are the log, the add-in class name and the path to its source")
+        return 1
+
+    logPath, moduleName, sourcePath = arguments
+
+    capp = loadCapp(capp)
+    os.environ.pop('CAPP_RECORD',None)
+    import capprecord
+
+    try:
+        calls, dropped = capprecord.readLog(logPath)
+    except (IOError, ValueError) as error:
+        print ("I cannot read the log - " + str(error))
+        return 1
+
+    addIn = capp.processFile(sourcePath,moduleName)
+    if addIn is None:
+        print ("I cannot find the add-in " + moduleName + " in " + sourcePath)
+        return 1
+
+    names = set(method.name for method in addIn.methods)
+    calls = [call for call in calls if call.name in names and (methods is None or call.name in methods)]
+
+    module = loadAddIn(sourcePath,capp.wiring(addIn) if wired else '')
+    instance = createAddIn(module,addIn)
+
+    functions, mismatches = replay(instance,calls,repeat)
+
+    print ('%s in %s%s, %d calls from %s' % (moduleName, os.path.normpath(sourcePath), ' (wired)' if wired else '', len(calls), logPath))
+    print ('%-24s %8s %12s %12s %10s %8s' % ('function', 'calls', 'recorded', 'replayed', 'mismatches', 'skipped'))
+    for name in sorted(functions):
+        counts = functions[name]
+        replayed = counts['calls'] or 1
+        print ('%-24s %8d %10.1fus %10.1fus %10d %8d' % (name, counts['calls'], counts['recorded'] * 1000000 / replayed,
+               counts['replayed'] * 1000000 / replayed / repeat, counts['mismatches'], counts['skipped']))
+
+    for call, arguments, result in mismatches[:show]:
+        print ('mismatch: %s%r recorded %r, replayed %r' % (call.name, arguments, call.value(), result))
+
+    if dropped:
+        print ('%d calls were dropped from the log' % dropped)
+
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
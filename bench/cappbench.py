@@ -0,0 +1,235 @@
+'''
+Calc Add-In Preprocessor Benchmark
+
+This Python script measures how the capp.py script scales with the size of
+the add-in source it is given.  It runs under Python 2 or Python 3 and so
+may measure either version of capp.py.
+
+Add-in sources are synthesised in the shape of doobiedoo.py, with a number
+of methods each having a long multi-line description.  For each size the
+script reports:
+    lines/s  - the rate at which processInput parses the source
+    parse    - the time processInput takes
+    idl, xcu, xml - the time each generator takes
+    peak     - the peak memory allocated while parsing and generating or,
+               where tracemalloc is not available (Python 2), the peak
+               resident set size of the whole process so far
+
+The script takes the options:
+    --capp path      - the capp.py to measure (default: the one for this Python)
+    --engine name    - the extraction engine to measure, if capp.py has more than one
+    --sizes n,...    - the numbers of methods (default: 10,100,1000,10000)
+    --prose n        - the lines of prose in each method description (default: 20)
+    --repeat n       - the number of runs of which the fastest is taken (default: 3)
+    --save path      - save the results as a baseline
+    --compare path   - compare the results with a baseline
+    --tolerance x    - how many times slower than the baseline is a regression (default: 1.5)
+The exit status is 1 if a regression is found.
+
+Each version of capp.py must be measured by the version of Python it is for:
+
+    python2 bench/cappbench.py --compare bench/baselines/python2.json
+    python3 bench/cappbench.py --compare bench/baselines/python3.json
+
+Baselines are machine dependent.  Those in the baselines directory are for
+spotting gross regressions; save new ones before making fine comparisons.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, getopt, json, platform, timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+    import resource
+
+def loadCapp(path):
+    '''
+    import the capp.py script found at path as a module
+    '''
+    sys.path.insert(0,os.path.dirname(os.path.abspath(path)))
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location('capp',path)
+        capp = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(capp)
+    except ImportError:
+        import imp
+        capp = imp.load_source('capp',path)
+    return capp
+
+def synthesise(methods,prose):
+    '''
+    synthesise the lines of an add-in source with the given number of methods
+    '''
+    lines = [
+        "'''\n",
+        "The synthetic Add-In benchmark.\n",
+        "\n",
+        "moduleVersion = 1.00\n",
+        "publisherName = Benchmark Company\n",
+        "publisherLink = http://www.example.com\n",
+        "'''\n",
+        "\n",
+        "import uno, unohelper\n",
+        "from com.example.bench.Synthetic import XSynthetic\n",
+        "\n",
+        'unoComponentId = "com.example.bench.Synthetic.python.Synthetic"\n',
+        "\n",
+        "class Synthetic (unohelper.Base, XSynthetic):\n",
+        "    def __init__ (self, ctx):\n",
+        "        self.ctx = ctx\n",
+    ]
+
+    for index in range(methods):
+        name = 'synthetic%05d' % index
+        lines.append('\n')
+        lines.append('    def %s (self, a, b, c):\n' % name)
+        lines.append('        """\n')
+        lines.append('        Combines three numbers in the manner of method %d\n' % index)
+        lines.append('            a - the first number\n')
+        lines.append('            b - the second number\n')
+        lines.append('            c - the third number\n')
+        for dummy in range(prose):
+            lines.append('        This line of prose is here only to make the description long\n')
+        lines.append('        idl: double %s ([in] double a, [in] double b, [in] double c);\n' % name)
+        lines.append('        """\n')
+        lines.append('        return a * b + c\n')
+
+    lines.append('\n')
+    lines.append('def createInstance (ctx):\n')
+    lines.append('    return Synthetic (ctx)\n')
+    return lines
+
+def fastest(repeat,function,*args):
+    '''
+    the result of the function and the fastest of repeated timings of it
+    '''
+    best = None
+    for dummy in range(repeat):
+        start = timeit.default_timer()
+        result = function(*args)
+        elapsed = timeit.default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return result, best
+
+def measure(capp,methods,prose,repeat,engine):
+    '''
+    measure capp.py against a synthetic source with the given number of methods
+    '''
+    lines = synthesise(methods,prose)
+    processInput = capp.engines[engine] if engine else capp.processInput
+
+    addIn, parse = fastest(repeat,processInput,lines,'Synthetic','synthetic.py')
+    result = {
+        'methods' : methods,
+        'lines'   : len(lines),
+        'linesPerSecond' : len(lines) / parse,
+        'parse'   : parse,
+    }
+    for target in ['idl', 'xcu', 'xml']:
+        result[target] = fastest(repeat,capp.generate,addIn,target)[1]
+
+    if tracemalloc:
+        tracemalloc.start()
+        addIn = processInput(lines,'Synthetic','synthetic.py')
+        for target in ['idl', 'xcu', 'xml']:
+            capp.generate(addIn,target)
+        result['peak'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        result['peak'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return result
+
+def report(results,baseline,tolerance):
+    '''
+    print the results, comparing them with the baseline if there is one
+
+    Returns the number of regressions.
+    '''
+    regressions = 0
+    print ('%8s %8s %12s %10s %10s %10s %10s %10s' % ('methods', 'lines', 'lines/s', 'parse', 'idl', 'xcu', 'xml', 'peak'))
+    for result in results:
+        print ('%8d %8d %12.0f %9.4fs %9.4fs %9.4fs %9.4fs %9.1fM' % (result['methods'], result['lines'],
+               result['linesPerSecond'], result['parse'], result['idl'], result['xcu'], result['xml'],
+               result['peak'] / 1048576.0))
+        if baseline:
+            previous = baseline.get(str(result['methods']))
+            if previous:
+                for key in ['parse', 'idl', 'xcu', 'xml']:
+                    if result[key] > previous[key] * tolerance and result[key] > 0.001:
+                        print ('%8s regression: %s takes %.4fs against a baseline of %.4fs' % ('', key, result[key], previous[key]))
+                        regressions += 1
+    return regressions
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    here = os.path.dirname(os.path.abspath(argv[0]))
+    capp = os.path.join(here, '..', 'python%d' % sys.version_info[0], 'capp.py')
+    sizes = [10, 100, 1000, 10000]
+    prose = 20
+    repeat = 3
+    save = None
+    compare = None
+    tolerance = 1.5
+    engine = None
+
+    try:
+        options, arguments = getopt.getopt(argv[1:], '', ['capp=', 'engine=', 'sizes=', 'prose=', 'repeat=', 'save=', 'compare=', 'tolerance='])
+    except getopt.GetoptError as error:
+        print ("I do not understand my options - " + str(error))
+        return 1
+
+    for option, value in options:
+        if option == '--capp':
+            capp = value
+        elif option == '--engine':
+            engine = value
+        elif option == '--sizes':
+            sizes = [int(size) for size in value.split(',')]
+        elif option == '--prose':
+            prose = int(value)
+        elif option == '--repeat':
+            repeat = int(value)
+        elif option == '--save':
+            save = value
+        elif option == '--compare':
+            compare = value
+        elif option == '--tolerance':
+            tolerance = float(value)
+
+    baseline = None
+    if compare:
+        with open(compare,"r") as input:
+            baseline = json.load(input)['results']
+
+    print ('capp %s (%s engine) under Python %s' % (os.path.normpath(capp), engine or 'default', platform.python_version()))
+    module = loadCapp(capp)
+    results = [measure(module,size,prose,repeat,engine) for size in sizes]
+    regressions = report(results,baseline,tolerance)
+
+    if save:
+        with open(save,"w") as output:
+            json.dump({
+                'python'  : platform.python_version(),
+                'engine'  : engine or 'default',
+                'prose'   : prose,
+                'results' : dict((str(result['methods']), result) for result in results),
+            }, output, indent=4, sort_keys=True)
+            output.write('\n')
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
@@ -0,0 +1,161 @@
+'''
+Stand-in for the uno module of LibreOffice's Python
+
+An add-in imports uno, unohelper and its own interface from a UNO module,
+none of which exist outside LibreOffice.  This directory, put first on
+sys.path, provides stand-ins good enough for an add-in to be imported and
+its functions called, to benchmark or test them, without LibreOffice.
+
+As pyuno does, importing this module makes UNO types importable:
+
+    from com.sun.star.sheet import XVolatileResult, ResultEvent
+
+Any name imported from a module under com is made up on the spot:
+    X<Name>          - an interface, a class for add-in classes to derive from
+    <Name>Exception  - an exception, derived from Exception
+    anything else    - a struct, whose fields may be given as keyword arguments
+
+The component context has no services.  Nothing else of UNO is provided.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, types
+
+'''
+The top level modules of UNO types:  not org, as copy and others try org.python
+'''
+_roots = ('com',)
+
+class Struct(object):
+    '''
+    a stand-in UNO struct:  any fields, given as keyword arguments or set later
+    '''
+    typeName = 'struct'
+
+    def __init__(self,**fields):
+        for name, value in fields.items():
+            setattr(self,name,value)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.typeName, ', '.join('%s=%r' % item for item in sorted(vars(self).items())))
+
+class Interface(object):
+    '''
+    a stand-in UNO interface, from which add-in classes derive
+    '''
+    typeName = 'com.sun.star.uno.XInterface'
+
+def makeType(moduleName,name):
+    '''
+    make up the UNO type of the given name in the given UNO module
+    '''
+    typeName = moduleName + '.' + name
+    if name.startswith('X') and name[1:2].isupper():
+        return type(name,(Interface,),{'__module__': moduleName, 'typeName': typeName})
+    if name.endswith('Exception'):
+        return type(name,(Exception,),{'__module__': moduleName, 'typeName': typeName})
+    return type(name,(Struct,),{'__module__': moduleName, 'typeName': typeName})
+
+class UnoModule(types.ModuleType):
+    '''
+    a UNO module:  every name looked up in it is a UNO type, made up the first time
+    '''
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name[:1].islower():
+            return importModule(self.__name__ + '.' + name)
+        value = makeType(self.__name__,name)
+        setattr(self,name,value)
+        return value
+
+class UnoFinder(object):
+    '''
+    the finder and loader of UNO modules, installed on sys.meta_path
+    '''
+    def find_module(self,name,path=None):
+        if name.split('.')[0] in _roots:
+            return self
+        return None
+
+    def find_spec(self,name,path=None,target=None):
+        if name.split('.')[0] not in _roots:
+            return None
+        import importlib.machinery
+        return importlib.machinery.ModuleSpec(name,self,is_package=True)
+
+    def create_module(self,spec):
+        return self.load_module(spec.name)
+
+    def exec_module(self,module):
+        pass
+
+    def load_module(self,name):
+        module = sys.modules.get(name)
+        if module is None:
+            module = UnoModule(name)
+            module.__path__ = []
+            module.__loader__ = self
+            sys.modules[name] = module
+        return module
+
+def importModule(name):
+    '''
+    the UNO module of the given name, imported if it has not been
+    '''
+    __import__(name)
+    return sys.modules[name]
+
+if not any(isinstance(finder,UnoFinder) for finder in sys.meta_path):
+    sys.meta_path.append(UnoFinder())
+
+class ComponentContext(object):
+    '''
+    a stand-in component context, with no services
+    '''
+    def getServiceManager(self):
+        return None
+
+    def getValueByName(self,name):
+        return None
+
+_context = ComponentContext()
+
+def getComponentContext():
+    '''
+    the component context, which has no services
+    '''
+    return _context
+
+def createUnoStruct(typeName,*args,**fields):
+    '''
+    a new instance of the named struct
+    '''
+    moduleName, name = typeName.rsplit('.',1)
+    return getattr(importModule(moduleName),name)(**fields)
+
+class Any(object):
+    '''
+    a value with an explicit UNO type
+    '''
+    def __init__(self,type,value):
+        self.type  = type
+        self.value = value
+
+def systemPathToFileUrl(path):
+    '''
+    the file URL of a pathname
+    '''
+    return 'file://' + path
+
+def fileUrlToSystemPath(url):
+    '''
+    the pathname of a file URL
+    '''
+    return url[len('file://'):] if url.startswith('file://') else url
+
+# EOF
@@ -0,0 +1,68 @@
+'''
+Stand-in for the unohelper module of LibreOffice's Python
+
+Add-in classes derive from unohelper.Base and register themselves with a
+unohelper.ImplementationHelper, as g_ImplementationHelper.  The stand-ins
+keep what is registered so a harness may create an instance of an add-in by
+its implementation name, as LibreOffice does.  See uno.py.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import uno
+
+from uno import systemPathToFileUrl, fileUrlToSystemPath
+
+class Base(object):
+    '''
+    the base of every UNO object implemented in Python
+    '''
+    def getTypes(self):
+        '''
+        the UNO interfaces the object implements
+        '''
+        return tuple(cls for cls in type(self).__mro__ if issubclass(cls,uno.Interface) and 'typeName' in vars(cls) and cls is not uno.Interface)
+
+    def getImplementationId(self):
+        return ()
+
+class Implementation(object):
+    '''
+    one registered implementation:  how to create it and the services it supports
+    '''
+    def __init__(self,constructor,serviceNames):
+        self.constructor  = constructor
+        self.serviceNames = serviceNames
+
+class ImplementationHelper(object):
+    '''
+    the implementations a Python component registers, by implementation name
+    '''
+    def __init__(self):
+        self.impls = {}
+
+    def addImplementation(self,constructor,implementationName,serviceNames,*args):
+        self.impls[implementationName] = Implementation(constructor,serviceNames)
+
+    def createInstance(self,implementationName,ctx=None):
+        '''
+        a new instance of the named implementation, as LibreOffice would create it
+        '''
+        return self.impls[implementationName].constructor(ctx or uno.getComponentContext())
+
+    def getSupportedServices(self,implementationName):
+        return self.impls[implementationName].serviceNames
+
+    def supportsService(self,implementationName,serviceName):
+        return serviceName in self.impls[implementationName].serviceNames
+
+    def getComponentFactory(self,implementationName,regKey,smgr):
+        return self.impls.get(implementationName)
+
+    def writeRegistryInfo(self,regKey,smgr):
+        return True
+
+# EOF
@@ -7,15 +7,22 @@ This Python script can be used to pre-processes the Python source file of
 a LibreOffice calc add-in to generate files needed to package the add-in.
 
 The script takes three arguments:
-    generate   - what to generate, one of idl, xcu or xml
+    generate   - what to generate, one of idl, xcu, xml, manifest, json or all
     moduleName - the name of the add-in module
     sourceFile - the path of the add-in's Python source files
-Output is to standard output.
+Output is to standard output except for all, which takes the option:
+    -o outputDir - the directory in which to write every generated file
+and parses the source file once to generate all four files together.
 
 Most, but not all, the information used to generate the description files
 appears as comments in the Python source file.  If the information is missing
 or not in the form expected by the script, the output will be incomplete.
 
+The script may also be imported, which has no side effects:
+    processInput  parses add-in source into an AddIn model
+    generate      renders one target from an AddIn model as a string
+    packageFiles  renders every generated package file as bytes
+
 For more information see the module documentation in capp-help.py.
 '''
 
@@ -24,7 +31,7 @@ For more information see the module documentation in capp-help.py.
     Released under the terms of the GNU GPL v2
 '''
 
-import sys, re
+import sys, os, re, getopt, json
 
 '''
 Regular expressions that support simple parsing of the Python source
@@ -42,19 +49,78 @@ def strip(item):
     '''
     return item.strip()
 
-def processInput(sourceFile,moduleName,generate):
+class Method(object):
+    '''
+    an add-in function:  a public method of the add-in class
+
+    The description, parameter descriptions and IDL signature are taken
+    from the method's multi-line description.
+    '''
+    def __init__(self,name,parameterNames):
+        self.name                  = name
+        self.description           = ""
+        self.parameterNames        = parameterNames
+        self.parameterDescriptions = {}
+        self.idlSignature          = []
+
+    def asDict(self):
+        '''
+        the method as a dictionary fit for json
+        '''
+        return {
+            'name'                  : self.name,
+            'description'           : self.description,
+            'parameterNames'        : self.parameterNames,
+            'parameterDescriptions' : self.parameterDescriptions,
+            'idlSignature'          : self.idlSignature,
+        }
+
+class AddIn(object):
+    '''
+    the calc add-in:  everything processInput finds in the Python source
+    '''
+    def __init__(self,moduleName,sourceName):
+        self.moduleName     = moduleName
+        self.interfaceName  = 'X' + moduleName
+        self.sourceName     = sourceName
+        self.unoModuleId    = ""
+        self.unoComponentId = ""
+        self.moduleVersion  = "1.00"
+        self.displayName    = ""
+        self.publisherLink  = ""
+        self.publisherName  = ""
+        self.methods        = []
+
+    def asDict(self):
+        '''
+        the add-in as a dictionary fit for json
+        '''
+        return {
+            'moduleName'     : self.moduleName,
+            'interfaceName'  : self.interfaceName,
+            'sourceName'     : self.sourceName,
+            'unoModuleId'    : self.unoModuleId,
+            'unoComponentId' : self.unoComponentId,
+            'moduleVersion'  : self.moduleVersion,
+            'displayName'    : self.displayName,
+            'publisherLink'  : self.publisherLink,
+            'publisherName'  : self.publisherName,
+            'methods'        : [method.asDict() for method in self.methods],
+        }
+
+def processInput(sourceFile,moduleName,sourceName=None):
     '''
-    process the input a line at a time, generating output when convenient
+    process the input a line at a time, building a model of the add-in
 
     Regular expressions trigger state changes as input lines of significance are recognised.
-    Certain state changes trigger the generation of output.
-    What is generated is determined by the generate parameter.
+    The AddIn model is returned only if the UNO module id and the add-in class are found,
+    otherwise the result is None.
     '''
-    interfaceName = 'X' + moduleName
-    moduleVersion = "1.00"
-    displayName   = ""
-    publisherLink = ""
-    publisherName = ""
+    if sourceName is None:
+        sourceName = os.path.basename(getattr(sourceFile,'name',moduleName + '.py'))
+
+    addIn = AddIn(moduleName,sourceName)
+    found = False
 
     state = "Seeking";
 
@@ -65,11 +131,11 @@ def processInput(sourceFile,moduleName,generate):
                 continue
             result = _reFromImport.match(line)
             if result:
-                if interfaceName == result.group(2):
-                    unoModuleId = result.group(1)
+                if addIn.interfaceName == result.group(2):
+                    addIn.unoModuleId = result.group(1)
                     state = "Have UNO Module Id"
         elif state == "Display Name":
-            displayName = line.strip()
+            addIn.displayName = line.strip()
             state = "Module Description"
         elif state == "Module Description":
             if _reTripleQ.match(line) or _reTripleA.match(line):
@@ -78,146 +144,158 @@ def processInput(sourceFile,moduleName,generate):
                 work = map(strip,line.split('='))
                 if len(work) == 2:
                     if work[0] == "moduleVersion":
-                        moduleVersion = work[1]
+                        addIn.moduleVersion = work[1]
                     elif work[0] == "publisherLink":
-                        publisherLink = work[1]
+                        addIn.publisherLink = work[1]
                     elif work[0] == "publisherName":
-                        publisherName = work[1]
-        elif state == "Method Description":
-            methodDescription = line.strip().capitalize()
-            state = "Parameter Descriptions"
+                        addIn.publisherName = work[1]
         elif state == "Have UNO Module Id":
             result = _reComponent.match(line)
             if result:
-                unoComponentId = result.group(1)
+                addIn.unoComponentId = result.group(1)
                 continue
             result = _reClassDef.match(line)
             if result:
-                if interfaceName == result.group(2):
+                if addIn.interfaceName == result.group(2):
                     if moduleName == result.group(1):
-                        if generate == "idl":
-                            idlGeneratePreamble(unoModuleId,interfaceName)
-                        if generate == "xcu":
-                            xcuGeneratePreamble(unoComponentId)
+                        found = True
                         state = "Class Implementation"
         elif state == "Class Implementation" or state == "Method Implementation":
             result = _reMethodDef.match(line)
             if result:
                 if result.group(1)[0] != '_':
-                    methodName = result.group(1)
-                    methodDescription = ""
-                    parameterNames = map(strip,result.group(2).split(','))
-                    parameterDescriptions = {}
-                    idlSignature = []
+                    method = Method(result.group(1),map(strip,result.group(2).split(',')))
                     state = "Method Declaration"
         elif state == "Method Declaration":
             if _reTripleQ.match(line) or _reTripleA.match(line):
                 state = "Method Description"
         elif state == "Method Description":
-            methodDescription = line.strip().capitalize()
+            method.description = line.strip().capitalize()
             state = "Parameter Descriptions"
         elif state == "Parameter Descriptions":
             if _reTripleQ.match(line) or _reTripleA.match(line):
-                if generate == "idl":
-                    idlGenerateSignature(idlSignature)
-                if generate == "xcu":
-                    xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,parameterDescriptions)
+                addIn.methods.append(method)
                 state = "Method Implementation"
             elif line.find(':') != -1:
                 work = map(strip,line.split(':'))
                 if len(work) == 2:
-                    idlSignature.append(work[1])
+                    method.idlSignature.append(work[1])
             elif line.find('-') != -1:
                 work = map(strip,line.split('-'))
                 if len(work) == 2:
-                    parameterDescriptions[work[0]] = work[1]
+                    method.parameterDescriptions[work[0]] = work[1]
+
+    if found:
+        return addIn
 
-    if state != "Seeking":
-        if generate == "xml":
-            xmlGenerateDescription(unoModuleId,moduleVersion,displayName,publisherLink,publisherName)
-        if generate == "idl":
-            idlGeneratePostamble(unoModuleId)
-        if generate == "xcu":
-            xcuGeneratePostamble()
+    return None
 
-    return sourceFile
+def processFile(sourcePath,moduleName):
+    '''
+    process the Python source file found at the given path
+    '''
+    with open(sourcePath,"r") as sourceFile:
+        return processInput(sourceFile,moduleName)
 
 def xmlGenerateDescription(unoModuleId,moduleVersion,displayName,publisherLink,publisherName):
     '''
     generate the XML description of the module`
     '''
-    print '<?xml version="1.0" encoding="UTF-8"?>'
-    print '<description xmlns="http://openoffice.org/extensions/description/2006"'
-    print '  xmlns:d="http://openoffice.org/extensions/description/2006"'
-    print '  xmlns:xlink="http://www.w3.org/1999/xlink">'
-    print ''
-    print '  <dependencies>'
-    print '    <OpenOffice.org-minimal-version value="2.4" d:name="OpenOffice.org 2.4"/>'
-    print '  </dependencies>'
-    print ''
-    print '  <identifier value="' + unoModuleId + '" />'
-    print '  <version value="' + moduleVersion + '" />'
-    print '  <display-name><name lang="en">' + displayName + '</name></display-name>'
+    lines = []
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<description xmlns="http://openoffice.org/extensions/description/2006"')
+    lines.append('  xmlns:d="http://openoffice.org/extensions/description/2006"')
+    lines.append('  xmlns:xlink="http://www.w3.org/1999/xlink">')
+    lines.append('')
+    lines.append('  <dependencies>')
+    lines.append('    <OpenOffice.org-minimal-version value="2.4" d:name="OpenOffice.org 2.4"/>')
+    lines.append('  </dependencies>')
+    lines.append('')
+    lines.append('  <identifier value="' + unoModuleId + '" />')
+    lines.append('  <version value="' + moduleVersion + '" />')
+    lines.append('  <display-name><name lang="en">' + displayName + '</name></display-name>')
     if publisherLink:
-        print '  <publisher><name xlink:href="' + publisherLink + '" lang="en">' + publisherName + '</name></publisher>'
+        lines.append('  <publisher><name xlink:href="' + publisherLink + '" lang="en">' + publisherName + '</name></publisher>')
     else:
-        print '  <publisher><name lang="en">' + publisherName + '</name></publisher>'
-    print ''
-    print '</description>'
+        lines.append('  <publisher><name lang="en">' + publisherName + '</name></publisher>')
+    lines.append('')
+    lines.append('</description>')
+    return '\n'.join(lines) + '\n'
+
+def xmlGenerateManifest(rdbName,sourceName,xcuName):
+    '''
+    generate the package manifest listing
+        the type library, the Python component and the configuration data
+    '''
+    fmtManifest = '    <manifest:file-entry manifest:media-type="application/vnd.sun.star.%s" manifest:full-path="%s"/>'
+
+    lines = []
+    lines.append('<manifest:manifest>')
+    lines.append(fmtManifest % ('uno-typelibrary;type=RDB', rdbName))
+    lines.append(fmtManifest % ('uno-component;type=Python', sourceName))
+    lines.append(fmtManifest % ('configuration-data', xcuName))
+    lines.append('</manifest:manifest>')
+    return '\n'.join(lines) + '\n'
 
 def idlGeneratePreamble(unoModuleId,interfaceName):
     '''
     generate the IDL file's head comprising
         the interface clause declaration within the UNO module's namespace
     '''
-    print '#include <com/sun/star/uno/XInterface.idl>'
-    print
-    for item in unoModuleId.split('.'):
-        print 'module ' + item + ' {',
-    print
-    print
-    print '    interface ' + interfaceName
-    print '    {'
+    lines = []
+    lines.append('#include <com/sun/star/uno/XInterface.idl>')
+    lines.append('')
+    lines.append(' '.join(['module ' + item + ' {' for item in unoModuleId.split('.')]))
+    lines.append('')
+    lines.append('    interface ' + interfaceName)
+    lines.append('    {')
+    return '\n'.join(lines) + '\n'
 
 def idlGeneratePostamble(unoModuleId):
     '''
     generate the IDL file's tail comprising
         closing braces matching the open braces of the IDL file's head
     '''
-    print '    };'
-    print
-    for dummy in unoModuleId.split('.'):
-        print '};',
-    print
+    lines = []
+    lines.append('    };')
+    lines.append('')
+    lines.append(' '.join(['};' for dummy in unoModuleId.split('.')]))
+    return '\n'.join(lines) + '\n'
 
 def idlGenerateSignature(idlSignature):
     '''
     generate the IDL signature for a Python method
         found in the comments documenting the method
     '''
+    lines = []
     for item in idlSignature:
-        print '        ' + item
+        lines.append('        ' + item + '\n')
+    return ''.join(lines)
 
 def xcuGeneratePreamble(unoComponentId):
     '''
     generate the XCU file's head including
         the identification of the magic UNO node of the Python component
     '''
-    print '<?xml version="1.0" encoding="UTF-8"?>'
-    print '<oor:component-data xmlns:oor="http://openoffice.org/2001/registry" xmlns:xs="http://www.w3.org/2001/XMLSchema" oor:name="CalcAddIns" oor:package="org.openoffice.Office">'
-    print '  <node oor:name="AddInInfo">'
-    print '    <node oor:name="' + unoComponentId + '" oor:op="replace">'
-    print '      <node oor:name="AddInFunctions">'
+    lines = []
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<oor:component-data xmlns:oor="http://openoffice.org/2001/registry" xmlns:xs="http://www.w3.org/2001/XMLSchema" oor:name="CalcAddIns" oor:package="org.openoffice.Office">')
+    lines.append('  <node oor:name="AddInInfo">')
+    lines.append('    <node oor:name="' + unoComponentId + '" oor:op="replace">')
+    lines.append('      <node oor:name="AddInFunctions">')
+    return '\n'.join(lines) + '\n'
 
 def xcuGeneratePostamble():
     '''
     generate the XCU file's tail
         closing XML elements opened in the XCU file's head
     '''
-    print '      </node>'
-    print '    </node>'
-    print '  </node>'
-    print '</oor:component-data>'
+    lines = []
+    lines.append('      </node>')
+    lines.append('    </node>')
+    lines.append('  </node>')
+    lines.append('</oor:component-data>')
+    return '\n'.join(lines) + '\n'
 
 def xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,parameterDescriptions):
     '''
@@ -225,45 +303,160 @@ def xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,param
         from comments documenting the method
     '''
     xlsName = 'AutoAddIn.' + moduleName + '.' + methodName
-    print '        <node oor:name="' + methodName + '" oor:op="replace">'
-    print '          <prop oor:name="DisplayName"><value xml:lang="en">' + methodName + '</value></prop>'
-    print '          <prop oor:name="Description"><value xml:lang="en">' + methodDescription + '</value></prop>'
-    print '          <prop oor:name="Category"><value>' + 'Add-In' + '</value></prop>'
-    print '          <prop oor:name="CompatibilityName"><value xml:lang="en">' + xlsName + '</value></prop>'
-    print '          <node oor:name="Parameters">'
+
+    lines = []
+    lines.append('        <node oor:name="' + methodName + '" oor:op="replace">')
+    lines.append('          <prop oor:name="DisplayName"><value xml:lang="en">' + methodName + '</value></prop>')
+    lines.append('          <prop oor:name="Description"><value xml:lang="en">' + methodDescription + '</value></prop>')
+    lines.append('          <prop oor:name="Category"><value>' + 'Add-In' + '</value></prop>')
+    lines.append('          <prop oor:name="CompatibilityName"><value xml:lang="en">' + xlsName + '</value></prop>')
+    lines.append('          <node oor:name="Parameters">')
 
     for name in parameterNames:
-        print '            <node oor:name="' + name +'" oor:op="replace">'
-        print '              <prop oor:name="DisplayName"><value xml:lang="en">' + name + '</value></prop>'
-        print '              <prop oor:name="Description"><value xml:lang="en">' + parameterDescriptions[name] + '</value></prop>'
-        print '            </node>'
+        lines.append('            <node oor:name="' + name +'" oor:op="replace">')
+        lines.append('              <prop oor:name="DisplayName"><value xml:lang="en">' + name + '</value></prop>')
+        lines.append('              <prop oor:name="Description"><value xml:lang="en">' + parameterDescriptions[name] + '</value></prop>')
+        lines.append('            </node>')
+
+    lines.append('          </node>')
+    lines.append('        </node>')
+    return '\n'.join(lines) + '\n'
+
+def idlGenerate(addIn):
+    '''
+    generate the IDL file declaring the add-in's interface
+    '''
+    parts = [idlGeneratePreamble(addIn.unoModuleId,addIn.interfaceName)]
+    for method in addIn.methods:
+        parts.append(idlGenerateSignature(method.idlSignature))
+    parts.append(idlGeneratePostamble(addIn.unoModuleId))
+    return ''.join(parts)
+
+def xcuGenerate(addIn):
+    '''
+    generate the XCU file describing the add-in's functions
+    '''
+    parts = [xcuGeneratePreamble(addIn.unoComponentId)]
+    for method in addIn.methods:
+        parts.append(xcuGenerateNode(addIn.moduleName,method.name,method.description,method.parameterNames,method.parameterDescriptions))
+    parts.append(xcuGeneratePostamble())
+    return ''.join(parts)
+
+def xmlGenerate(addIn):
+    '''
+    generate the XML description of the add-in's package
+    '''
+    return xmlGenerateDescription(addIn.unoModuleId,addIn.moduleVersion,addIn.displayName,addIn.publisherLink,addIn.publisherName)
 
-    print '          </node>'
-    print '        </node>'
+def manifestGenerate(addIn):
+    '''
+    generate the manifest of the add-in's package
+    '''
+    return xmlGenerateManifest(addIn.interfaceName + '.rdb',addIn.sourceName,addIn.moduleName + '.xcu')
+
+def jsonGenerate(addIn):
+    '''
+    generate a json dump of the add-in model
+    '''
+    return json.dumps(addIn.asDict(),indent=4,sort_keys=True) + '\n'
+
+'''
+The generators, by target, each of which renders an AddIn model as a string
+'''
+generators = {
+    'idl'      : idlGenerate,
+    'xcu'      : xcuGenerate,
+    'xml'      : xmlGenerate,
+    'manifest' : manifestGenerate,
+    'json'     : jsonGenerate,
+}
 
+def generate(addIn,target):
+    '''
+    generate the contents of the given target
+    '''
+    return generators[target](addIn)
+
+def packageFiles(addIn):
+    '''
+    generate the contents of every file the package needs, bar two
+
+    The result maps pathnames within the package to their contents.
+    The Python source and the type library built from the IDL are not included.
+    '''
+    return {
+        addIn.interfaceName + '.idl' : idlGenerate(addIn),
+        addIn.moduleName + '.xcu'    : xcuGenerate(addIn),
+        'description.xml'            : xmlGenerate(addIn),
+        'META-INF/manifest.xml'      : manifestGenerate(addIn),
+    }
+
+def writePackageFiles(addIn,outputDir):
+    '''
+    write the files generated by packageFiles into the output directory
+    '''
+    for name, content in packageFiles(addIn).items():
+        path = os.path.join(outputDir,*name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path,"wb") as output:
+            output.write(content)
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
 
-if sys.argv[0].find('pydoc') ==  -1:
     '''
     Recognise the first argument
     '''
+    targets = ['idl', 'xcu', 'xml', 'manifest', 'json', 'all']
 
-    if not sys.argv[1] in ['idl', 'xcu', 'xml']:
-        print ("I need to know what to generate - my first argument must be one of ['idl', 'xcu', 'xml']")
-        sys.exit(1)
+    if len(argv) < 2 or not argv[1] in targets:
+        print "I need to know what to generate - my first argument must be one of " + str(targets)
+        return 1
 
     '''
-    Open the python source file
+    Recognise the options that follow the module name and source file
     '''
+    try:
+        options, arguments = getopt.getopt(argv[4:], 'o:')
+    except getopt.GetoptError as error:
+        print "I do not understand my options - " + str(error)
+        return 1
+
+    outputDir = None
+    for option, value in options:
+        if option == '-o':
+            outputDir = value
 
+    if argv[1] == 'all' and not outputDir:
+        print "I need to know where to put everything - all requires the -o <directory> option"
+        return 1
+
+    '''
+    Preprocess the python source file ...
+    '''
     try:
-        sourceFile = open(sys.argv[3],"r")
-    except:
+        addIn = processFile(argv[3],argv[2])
+    except (IndexError, IOError):
         print "I need a python module to process - the module name and the path to the module's implementation"
-        sys.exit(1)
+        return 1
+
+    if addIn is None:
+        return 0
 
     '''
-    Preprocess the python source file ...
+    ... and write out what was asked for
     '''
-    processInput(sourceFile,sys.argv[2],sys.argv[1]).close()
+    if argv[1] == 'all':
+        writePackageFiles(addIn,outputDir)
+    else:
+        sys.stdout.write(generate(addIn,argv[1]))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
 
 # EOF
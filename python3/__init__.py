@@ -4,6 +4,33 @@ Python 2.x.x support for packaging add-in functions for LibreOffice calc
     capp
         preprocessor script to generate three package files from Python source
 
+    cappserve
+        server that keeps the capp script resident, and its client
+
+    cappasync
+        runtime for the async directive, packaged with add-ins that use it
+
+    cappcache
+        runtime for the cache directive, packaged with add-ins that use it
+
+    cappranges
+        conversions between ranges and arrays, the runtime for the range directive
+
+    cappstats
+        runtime for the --stats option, packaged with add-ins built with it
+
+    capprecord
+        runtime for the --record option, and summariser of the calls it records
+
+    capptrace
+        recorder of the --trace option, and summariser of the traces it writes
+
+    oxt
+        writer of oxt packages, used by the capp script to package add-ins
+
+    rdb
+        writer of type libraries, used by the capp script in place of the SDK
+
     capp-help
         description of what the capp script requires from add-in source files
 
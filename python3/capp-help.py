@@ -30,6 +30,41 @@ one file with each invocation.  Eg:
     capp idl <module_name> <source_file> > X<module_name>.idl
     capp xcu <module_name> <source_file> > <module_name>.xcu
     capp xml <module_name> <source_file> > description.xml
+    capp manifest <module_name> <source_file> > META-INF/manifest.xml
+
+The exception is all, which parses the source once and writes all four files
+into the directory given by the -o option:
+
+    capp all <module_name> <source_file> -o <directory>
+
+The json target writes the model the script builds from the source, which is
+useful for checking what the script has found:
+
+    capp json <module_name> <source_file>
+
+The rdb target writes the type library, in the binary UNOIDL format, without
+the SDK.  It declares the same interface the IDL does.  Named types in the IDL
+signatures must then be qualified with their modules.
+
+    capp rdb <module_name> <source_file> -o X<module_name>.rdb
+
+The build target writes the IDL and the type library, as the rdb target does
+or by running the command given by the --types option, such as idlc and
+regmerge, and then writes the package.  The other package files are generated
+meanwhile.  It is what liboaddon package uses.
+
+The watch target stays resident and writes the package again each time the
+source changes, building the type library again only when the IDL changes.
+It is what liboaddon watch uses.
+
+The --engine scan option selects a faster way of parsing the source that is
+worth having for large, machine generated add-ins.  The result is the same.
+
+The script may also be imported as a module.  Importing it does not run it.
+The function processInput parses source into an AddIn model (or None if the
+add-in is not found) and the function generate renders one target from the
+model as a string, so a long running process may parse once and generate
+many times.
 
 The <module_name> is the case sensitive name of the Python class defined in
 the source file that contains the add-in functions.  Any other classes are
@@ -75,6 +110,19 @@ The script is single pass.  It expects to find the UNO interface name and
 module id first, then the UNO component id and then the class signature.
 Unless they are all present in this order the script will generate no output.
 
+Given the --bundle option, the script packages every such class it finds,
+in every source file given, together.  The IDL then declares an interface
+for each, the XCU describes the functions of each component and the
+manifest lists each source file.  Each class takes the UNO component id that
+precedes it, the UNO module id of the interface it implements and the
+details of its source's module description.  The package's own description
+is that of the first class found.
+
+    capp oxt <package_name> <source_file>... --bundle -o <oxt> --rdb X<package_name>.rdb
+
+The add-in classes of a package share one process, and function names
+across them must be unique.
+
 Method Name and Description
 ---------------------------
 
@@ -98,6 +146,9 @@ Each parameter description is a single line of the form:
 
   name - description
 
+where name is one of the method's parameters.  The description runs from the
+first '-' to the end of the line and so may itself contain '-'.
+
 The parameter names and descriptions are also used in the LibreOffice calc UI
 to document the method.
 
@@ -113,7 +164,142 @@ description in a line of the form:
      idl: <idl-signature>
 
 Such signatures are copied to the IDL file verbatim and must be terminated
-with a semi-colon.
+with a semi-colon.  Qualified types used in them, such as
+
+     com::sun::star::table::XCellRange
+
+are included in the IDL file for you.
+
+Ranges and Arrays
+-----------------
+
+An add-in function called once per cell pays for a call through UNO per cell.
+A function that takes whole ranges and returns an array result is called
+once per range instead.  Range parameters and array results are declared
+as sequences of sequences, a sequence of rows:
+
+     idl: sequence< sequence< double > > doobieMultArray ([in] sequence< sequence< double > > a, [in] sequence< sequence< double > > b);
+
+Use sequence< sequence< double > > for ranges of numbers, in which empty
+cells are 0, and sequence< sequence< any > > for ranges of anything, in
+which empty cells are None.  Such a function is entered in calc as an array
+formula.  The Python method receives a tuple of tuples and must return one.
+
+For a large range, converting the tuple of tuples cell by cell in Python can
+take longer than the function itself.  A method that takes ranges may have
+them converted in bulk, to compact arrays of doubles, with a line in its
+multi-line description of the form:
+
+     range: [<parameter>...] [as=array|numpy] [empty=<option>] [text=<option>]
+
+The parameters named, or else every parameter whose idl: type is a sequence
+of sequences, are passed as array('d') of the cells row by row, with the
+attributes rows and columns, or, given as=numpy, as two dimensional NumPy
+arrays.  Empty cells and strings become not a number unless the empty or
+text option says they become a number, such as 0, or raise an error, or,
+for text only, are parsed as numbers.  Should the method return such an
+array, it is converted back to a tuple of tuples.  The oxt target packages
+the cappranges.py runtime in the package's pythonpath directory.
+
+Caching
+-------
+
+Calc calls add-in functions again each time it recalculates, often with the
+same arguments as before.  A method whose result depends on nothing but its
+arguments may have its results cached with a line in its multi-line
+description of the form:
+
+     cache: [size=<entries>] [ttl=<seconds>]
+
+At most size results are kept (default: 128), the least recently used being
+forgotten first, each for at most ttl seconds (default: for ever).
+
+The oxt target packages such an add-in with a few lines of wiring appended
+to the Python source and with the cappcache.py runtime in the package's
+pythonpath directory.  The source itself is not changed.
+
+Asynchronous Functions
+----------------------
+
+A method that takes a long time blocks calc while it runs.  Such a method
+may run on a pool of threads instead with a line in its multi-line
+description of the form:
+
+     async: [workers=<threads>] [size=<entries>] [ttl=<seconds>]
+
+At most workers calls run at once (default: 4), at most size results are
+kept (default: 128) and for at most ttl seconds (default: for ever).  A call
+that raises an exception shows its message and is run again when next
+called.  The idl: line gives the type the method returns; the
+script declares the function as returning
+
+     com::sun::star::sheet::XVolatileResult
+
+instead, which calc shows as #PENDING until the method returns.  The oxt
+target packages the cappasync.py and cappcache.py runtimes in the package's
+pythonpath directory.
+
+Lazy Loading
+------------
+
+LibreOffice loads every add-in component when it starts, whether or not
+its functions are called, and with it everything the component imports.
+Given the --lazy option, the oxt target packages a thin registration stub
+as the component instead.  The stub imports no more than unohelper and the
+add-in's interface.  The Python source, renamed <source>_impl.py, goes in
+the package's pythonpath directory and is imported when a function is
+first called.
+
+The stub forwards every add-in function to an instance of the add-in class
+created then, so the class must be constructed from the component context
+alone, as createInstance does.
+
+Bytecode
+--------
+
+LibreOffice compiles the Python source of a component each time it loads it,
+docstrings and all, though the docstrings an add-in needs for the script
+serve no purpose once packaged.  Given the --bytecode option, the oxt target
+packages the add-in's source, wired up, compiled without its docstrings as
+<source>_impl.pyc in the package's pythonpath directory, and the runtime
+modules likewise.  The component is then a few lines that import the
+add-in's registrations from there or, with --lazy too, the registration stub.
+
+The bytecode is that of the Python running the script and no other version
+of Python will import it, so the script must be run by the Python of the
+LibreOffice the package is for, as liboaddon does.
+
+Statistics
+----------
+
+Given the --stats option, the script instruments every add-in function so
+that the calls to it are counted and timed, and adds one more function to
+each add-in, named after its class with its first letter lower case, such
+as, for the class DoobieDoo:
+
+     doobieDooStats()
+
+which, entered in calc as an array formula, returns a table of the call
+counts, times and latency histograms of that add-in's own functions.  As
+function names across add-ins must be unique, each add-in of a bundle, and
+of every package built with --stats, has a function of its own.  The option
+must be given for the idl target as well as the oxt target.  The oxt target
+packages the cappstats.py runtime in the package's pythonpath directory.
+
+Recording Calls
+---------------
+
+Given the --record option, the oxt target packages the capprecord.py runtime
+in the package's pythonpath directory and wires it up to every add-in
+function.  Nothing is recorded, and the functions are left as they are,
+unless soffice is started with CAPP_RECORD naming a log, such as
+
+     CAPP_RECORD=/tmp/calls-%p.log soffice workbook.ods
+
+in which case each call, with its arguments and result and how long it
+took, is recorded in a ring buffer of CAPP_RECORD_SIZE MiB (default: 16).
+The calls recorded may be summarised with capprecord.py and replayed against
+the add-in outside LibreOffice with bench/addinreplay.py.
 
 Display Name
 ------------
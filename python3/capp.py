@@ -5,15 +5,61 @@ This Python script can be used to pre-processes the Python source file of
 a LibreOffice calc add-in to generate files needed to package the add-in.
 
 The script takes three arguments:
-    generate   - what to generate, one of idl, xcu or xml
+    generate   - what to generate, one of idl, xcu, xml, manifest, json, rdb, all, oxt, build or watch
+                 or serve [--socket path] [--sdk directory], to answer requests over
+                 a socket (see cappserve.py)
     moduleName - the name of the add-in module
     sourceFile - the path of the add-in's Python source files
-Output is to standard output.
+Output is to standard output except for all, which takes the option:
+    -o outputDir - the directory in which to write every generated file
+and parses the source file once to generate all four files together,
+and for rdb, which writes the type library without the SDK (see rdb.py) and takes the option:
+    -o rdbFile   - the pathname of the type library
+and for oxt, which writes the package itself and takes the options:
+    -o oxtFile          - the pathname of the package
+    --rdb rdbFile       - the type library built from the IDL
+    --timestamp seconds - the time given to every member of the package
+    --compression level - from 0 (store) to 9 (the default)
+    --order name,...    - the members to write first, in order
+    --lazy              - package a registration stub that imports the add-in
+                          only when one of its functions is first called
+    --bytecode          - package the add-in and runtime modules as bytecode, without
+                          docstrings, for the Python running this script
+and for build, which takes the same options as oxt and writes the IDL beside
+the type library and builds that too, generating the other files meanwhile, plus:
+    --types command     - how to build the type library from the IDL, such as
+                          with idlc and regmerge, rather than as rdb does
+    --sdk directory     - build the type library with the idlc and regmerge of the
+                          LibreOffice installed in the directory, without a shell
+and for watch, which takes the same options as build and stays resident,
+writing the package again each time the source file changes, plus:
+    --interval seconds  - how often to look at the source file (default: 0.25)
+Any target, bar watch, takes further source files after the first and the option:
+    --bundle            - package every add-in class of every source file together,
+                          moduleName then naming the package rather than a class
+Any target takes the options:
+    --engine name       - how to parse the source, regex (the default) or scan
+    --stats             - instrument the add-in's functions and add <class>Stats (see cappstats.py)
+    --record            - let the add-in's calls be recorded, to replay them later (see capprecord.py)
+    --trace file        - append when each step starts and ends to a Chrome trace (see capptrace.py)
 
 Most, but not all, the information used to generate the description files
 appears as comments in the Python source file.  If the information is missing
 or not in the form expected by the script, the output will be incomplete.
 
+The script may also be imported, which has no side effects:
+    processInput   parses add-in source into an AddIn model
+    scanInput      does the same, faster, for large machine generated sources
+    processFiles   parses every add-in class of several sources into a Package model
+    parseSignature picks apart the IDL signature of an add-in function
+    generate       renders one target from an AddIn or Package model as a string
+    packageFiles   renders every generated package file as bytes
+    rdbGenerate    renders the type library as bytes
+    withStatistics instruments an AddIn model, as --stats does
+    withRecording  lets the calls to an AddIn model be recorded, as --record does
+    componentFiles renders the packaged components, wired up to the runtime modules they need
+    pipeline       runs the steps of a build, those that do not depend on each other at once
+
 For more information see the module documentation in capp-help.py.
 '''
 
@@ -22,7 +68,7 @@ For more information see the module documentation in capp-help.py.
     Released under the terms of the GNU GPL v2
 '''
 
-import sys, re
+import sys, os, re, getopt, json, copy, ast
 
 '''
 Regular expressions that support simple parsing of the Python source
@@ -33,6 +79,52 @@ _reClassDef   = re.compile(r'^class\s+(\S+)\s*\(\s*unohelper.Base\s*,\s*(\S+)\s*
 _reMethodDef  = re.compile(r'^\s+def\s+(\S*)\s*\(\s*self\s*,([^)]+)\)\s*:')
 _reTripleQ    = re.compile(r'^\s*"""\s*$')
 _reTripleA    = re.compile(r"^\s*'''\s*$")
+_reClassEnd   = re.compile(r'^(?:class|def)\s')
+_reDirective  = re.compile(r'^\s*(idl|cache|async|range)\s*:\s*(.*?)\s*$')
+
+'''
+The same regular expressions combined so one match classifies a line:
+the name of the last group matched identifies which of them matched.
+'''
+_reScanner    = re.compile(r'(?P<triple>\s*(?:"""|\'\'\')\s*$)'
+                           r'|from\s+(?P<importModule>\S+)\s+import\s+(?P<importName>\S+)'
+                           r'|unoComponentId\s*=\s*"(?P<component>[^"]*)"'
+                           r'|class\s+(?P<className>\S+)\s*\(\s*unohelper.Base\s*,\s*(?P<classBase>\S+)\s*\)\s*:'
+                           r'|\s+def\s+(?P<methodName>\S*)\s*\(\s*self\s*,(?P<methodParameters>[^)]+)\)\s*:'
+                           r'|\s*(?P<directive>idl|cache|async|range)\s*:\s*(?P<directiveValue>.*?)\s*$'
+                           r'|(?P<topLevel>class|def)\s')
+
+'''
+Regular expressions that pick apart an IDL signature
+'''
+_reSignature  = re.compile(r'^\s*(.+?)\s+(\w+)\s*\(([^)]*)\)(?:\s*raises\s*\(([^)]*)\))?\s*;\s*$')
+_reParameter  = re.compile(r'^\s*\[\s*(in|out|inout)\s*\]\s*(.+?)\s+(\w+)\s*$')
+_reQualified  = re.compile(r'\b(?:\w+::)+\w+')
+
+'''
+The trace of the steps the script takes, if it was asked for one (see capptrace.py)
+'''
+tracer = None
+
+class Untraced(object):
+    '''
+    the context in which a step is taken when there is no trace
+    '''
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exception):
+        return False
+
+_untraced = Untraced()
+
+def traced(name,category='capp'):
+    '''
+    the context in which the named step is taken, timed if there is a trace
+    '''
+    if tracer is None:
+        return _untraced
+    return tracer.span(name,category)
 
 def strip(item):
     '''
@@ -40,34 +132,169 @@ def strip(item):
     '''
     return item.strip()
 
-def processInput(sourceFile,moduleName,generate):
+class Method(object):
+    '''
+    an add-in function:  a public method of the add-in class
+
+    The description, parameter descriptions, IDL signature, cache options, async
+    options and range options are taken from the method's multi-line description.
+    '''
+    def __init__(self,name,parameterNames):
+        self.name                  = name
+        self.description           = ""
+        self.parameterNames        = parameterNames
+        self.parameterDescriptions = {}
+        self.idlSignature          = []
+        self.cache                 = None
+        self.asynchronous          = None
+        self.ranges                = None
+
+    def addDirective(self,directive,value):
+        '''
+        take note of a directive, such as idl:, found in the multi-line description
+        '''
+        if directive == 'idl':
+            self.idlSignature.append(value)
+        elif directive == 'cache':
+            self.cache = parseCacheOptions(value)
+        elif directive == 'async':
+            self.asynchronous = parseAsyncOptions(value)
+        elif directive == 'range':
+            self.ranges = parseRangeOptions(value)
+
+    def asDict(self):
+        '''
+        the method as a dictionary fit for json
+        '''
+        return {
+            'name'                  : self.name,
+            'description'           : self.description,
+            'parameterNames'        : self.parameterNames,
+            'parameterDescriptions' : self.parameterDescriptions,
+            'idlSignature'          : self.idlSignature,
+            'cache'                 : self.cache,
+            'asynchronous'          : self.asynchronous,
+            'ranges'                : self.ranges,
+        }
+
+class AddIn(object):
     '''
-    process the input a line at a time, generating output when convenient
+    the calc add-in:  everything processInput finds in the Python source
+    '''
+    def __init__(self,moduleName,sourceName):
+        self.moduleName     = moduleName
+        self.interfaceName  = 'X' + moduleName
+        self.sourceName     = sourceName
+        self.unoModuleId    = ""
+        self.unoComponentId = ""
+        self.moduleVersion  = "1.00"
+        self.displayName    = ""
+        self.publisherLink  = ""
+        self.publisherName  = ""
+        self.methods        = []
+        self.stats          = False
+        self.record         = False
+
+    def asDict(self):
+        '''
+        the add-in as a dictionary fit for json
+        '''
+        return {
+            'moduleName'     : self.moduleName,
+            'interfaceName'  : self.interfaceName,
+            'sourceName'     : self.sourceName,
+            'unoModuleId'    : self.unoModuleId,
+            'unoComponentId' : self.unoComponentId,
+            'moduleVersion'  : self.moduleVersion,
+            'displayName'    : self.displayName,
+            'publisherLink'  : self.publisherLink,
+            'publisherName'  : self.publisherName,
+            'methods'        : [method.asDict() for method in self.methods],
+            'stats'          : self.stats,
+            'record'         : self.record,
+        }
+
+class Package(object):
+    '''
+    the add-ins packaged together:  the AddIn models of one or more classes from one or more sources
+
+    The package is named for its type library, X<name>.rdb, and its configuration
+    data, <name>.xcu.  Its description is that of the first add-in.
+    '''
+    def __init__(self,name,addIns):
+        self.name      = name
+        self.typesName = 'X' + name
+        self.addIns    = addIns
+
+    def asDict(self):
+        '''
+        the package as a dictionary fit for json
+        '''
+        return {
+            'name'      : self.name,
+            'typesName' : self.typesName,
+            'addIns'    : [addIn.asDict() for addIn in self.addIns],
+        }
+
+def asPackage(model):
+    '''
+    the model as a Package:  an AddIn model is packaged on its own
+    '''
+    if isinstance(model,Package):
+        return model
+    return Package(model.moduleName,[model])
+
+def newAddIn(header,className,unoModuleId,unoComponentId):
+    '''
+    the model of an add-in class found, with the details taken from the module description
+    '''
+    addIn = AddIn(className,header.sourceName)
+    addIn.unoModuleId    = unoModuleId
+    addIn.unoComponentId = unoComponentId
+    addIn.displayName    = header.displayName
+    addIn.moduleVersion  = header.moduleVersion
+    addIn.publisherLink  = header.publisherLink
+    addIn.publisherName  = header.publisherName
+    return addIn
+
+def processInput(sourceFile,moduleName,sourceName=None):
+    '''
+    process the input a line at a time, building a model of the add-in
 
     Regular expressions trigger state changes as input lines of significance are recognised.
-    Certain state changes trigger the generation of output.
-    What is generated is determined by the generate parameter.
+    The AddIn model is returned only if the UNO module id and the add-in class are found,
+    otherwise the result is None.
+
+    If the module name is None, every add-in class is processed and the result is a list
+    of AddIn models, one for each class in the order found.  Each class takes the UNO
+    component id that precedes it.
     '''
-    interfaceName = 'X' + moduleName
-    moduleVersion = "1.00"
-    displayName   = ""
-    publisherLink = ""
-    publisherName = ""
+    if sourceName is None:
+        sourceName = os.path.basename(getattr(sourceFile,'name',(moduleName or 'addin') + '.py'))
+
+    header    = AddIn(moduleName or '',sourceName)
+    addIns    = []
+    imports   = {}
+    component = ""
 
     state = "Seeking";
 
     for line in sourceFile:
+        if state == "Class Implementation" or state == "Method Implementation":
+            if _reClassEnd.match(line):
+                state = "Have UNO Module Id"
+
         if state == "Seeking":
             if _reTripleQ.match(line) or _reTripleA.match(line):
                 state = "Display Name"
                 continue
             result = _reFromImport.match(line)
             if result:
-                if interfaceName == result.group(2):
-                    unoModuleId = result.group(1)
+                if moduleName is None or header.interfaceName == result.group(2):
+                    imports.setdefault(result.group(2),result.group(1))
                     state = "Have UNO Module Id"
         elif state == "Display Name":
-            displayName = line.strip()
+            header.displayName = line.strip()
             state = "Module Description"
         elif state == "Module Description":
             if _reTripleQ.match(line) or _reTripleA.match(line):
@@ -76,146 +303,502 @@ def processInput(sourceFile,moduleName,generate):
                 work = list(map(strip,line.split('=')))
                 if len(work) == 2:
                     if work[0] == "moduleVersion":
-                        moduleVersion = work[1]
+                        header.moduleVersion = work[1]
                     elif work[0] == "publisherLink":
-                        publisherLink = work[1]
+                        header.publisherLink = work[1]
                     elif work[0] == "publisherName":
-                        publisherName = work[1]
-        elif state == "Method Description":
-            methodDescription = line.strip().capitalize()
-            state = "Parameter Descriptions"
+                        header.publisherName = work[1]
         elif state == "Have UNO Module Id":
             result = _reComponent.match(line)
             if result:
-                unoComponentId = result.group(1)
+                component = result.group(1)
                 continue
             result = _reClassDef.match(line)
             if result:
-                if interfaceName == result.group(2):
-                    if moduleName == result.group(1):
-                        if generate == "idl":
-                            idlGeneratePreamble(unoModuleId,interfaceName)
-                        if generate == "xcu":
-                            xcuGeneratePreamble(unoComponentId)
+                if result.group(2) in imports and result.group(2) == 'X' + result.group(1):
+                    if moduleName is None or moduleName == result.group(1):
+                        addIn = newAddIn(header,result.group(1),imports[result.group(2)],component)
+                        addIns.append(addIn)
                         state = "Class Implementation"
+                continue
+            if moduleName is None:
+                result = _reFromImport.match(line)
+                if result:
+                    imports.setdefault(result.group(2),result.group(1))
         elif state == "Class Implementation" or state == "Method Implementation":
             result = _reMethodDef.match(line)
             if result:
                 if result.group(1)[0] != '_':
-                    methodName = result.group(1)
-                    methodDescription = ""
-                    parameterNames = list(map(strip,result.group(2).split(',')))
-                    parameterDescriptions = {}
-                    idlSignature = []
+                    method = Method(result.group(1),list(map(strip,result.group(2).split(','))))
                     state = "Method Declaration"
         elif state == "Method Declaration":
             if _reTripleQ.match(line) or _reTripleA.match(line):
                 state = "Method Description"
         elif state == "Method Description":
-            methodDescription = line.strip().capitalize()
+            method.description = line.strip().capitalize()
             state = "Parameter Descriptions"
         elif state == "Parameter Descriptions":
+            result = _reDirective.match(line)
             if _reTripleQ.match(line) or _reTripleA.match(line):
-                if generate == "idl":
-                    idlGenerateSignature(idlSignature)
-                if generate == "xcu":
-                    xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,parameterDescriptions)
+                addIn.methods.append(method)
                 state = "Method Implementation"
-            elif line.find(':') != -1:
-                work = list(map(strip,line.split(':')))
-                if len(work) == 2:
-                    idlSignature.append(work[1])
+            elif result:
+                method.addDirective(result.group(1),result.group(2))
             elif line.find('-') != -1:
-                work = list(map(strip,line.split('-')))
-                if len(work) == 2:
-                    parameterDescriptions[work[0]] = work[1]
+                work = list(map(strip,line.split('-',1)))
+                if work[0] in method.parameterNames:
+                    method.parameterDescriptions[work[0]] = work[1]
+
+    if moduleName is None:
+        return addIns
 
-    if state != "Seeking":
-        if generate == "xml":
-            xmlGenerateDescription(unoModuleId,moduleVersion,displayName,publisherLink,publisherName)
-        if generate == "idl":
-            idlGeneratePostamble(unoModuleId)
-        if generate == "xcu":
-            xcuGeneratePostamble()
+    if addIns:
+        return addIns[0]
+
+    return None
+
+def scanInput(sourceFile,moduleName,sourceName=None):
+    '''
+    process the input a line at a time, as processInput does, but faster
+
+    A single combined regular expression classifies each line, and then only
+    in those states in which the line may be of significance.  Lines of no
+    significance allocate nothing.  The AddIn model is the same as processInput's,
+    as is the list of models if the module name is None.
+    '''
+    if sourceName is None:
+        sourceName = os.path.basename(getattr(sourceFile,'name',(moduleName or 'addin') + '.py'))
 
-    return sourceFile
+    header    = AddIn(moduleName or '',sourceName)
+    addIn     = None
+    addIns    = []
+    imports   = {}
+    component = ""
+    scan      = _reScanner.match
+
+    state = "Seeking";
+
+    for line in sourceFile:
+        if state == "Method Implementation" or state == "Class Implementation":
+            result = scan(line)
+            if not result:
+                continue
+            if result.lastgroup == 'methodParameters':
+                if result.group('methodName')[0] != '_':
+                    method = Method(result.group('methodName'),[item.strip() for item in result.group('methodParameters').split(',')])
+                    state = "Method Declaration"
+                continue
+            if result.lastgroup != 'classBase' and result.lastgroup != 'topLevel':
+                continue
+            state = "Have UNO Module Id"
+
+        if state == "Parameter Descriptions":
+            result = scan(line)
+            if result and result.lastgroup == 'triple':
+                addIn.methods.append(method)
+                state = "Method Implementation"
+            elif result and result.lastgroup == 'directiveValue':
+                method.addDirective(result.group('directive'),result.group('directiveValue'))
+            elif '-' in line:
+                work = line.partition('-')
+                name = work[0].strip()
+                if name in method.parameterNames:
+                    method.parameterDescriptions[name] = work[2].strip()
+        elif state == "Method Declaration":
+            result = scan(line)
+            if result and result.lastgroup == 'triple':
+                state = "Method Description"
+        elif state == "Method Description":
+            method.description = line.strip().capitalize()
+            state = "Parameter Descriptions"
+        elif state == "Seeking":
+            result = scan(line)
+            if result:
+                if result.lastgroup == 'triple':
+                    state = "Display Name"
+                elif result.lastgroup == 'importName':
+                    if moduleName is None or header.interfaceName == result.group('importName'):
+                        imports.setdefault(result.group('importName'),result.group('importModule'))
+                        state = "Have UNO Module Id"
+        elif state == "Display Name":
+            header.displayName = line.strip()
+            state = "Module Description"
+        elif state == "Module Description":
+            result = scan(line)
+            if result and result.lastgroup == 'triple':
+                state = "Seeking"
+            elif '=' in line:
+                if line.count('=') == 1:
+                    work = line.partition('=')
+                    key = work[0].strip()
+                    if key == "moduleVersion":
+                        header.moduleVersion = work[2].strip()
+                    elif key == "publisherLink":
+                        header.publisherLink = work[2].strip()
+                    elif key == "publisherName":
+                        header.publisherName = work[2].strip()
+        elif state == "Have UNO Module Id":
+            result = scan(line)
+            if result:
+                if result.lastgroup == 'component':
+                    component = result.group('component')
+                elif result.lastgroup == 'classBase':
+                    className, classBase = result.group('className'), result.group('classBase')
+                    if classBase in imports and classBase == 'X' + className:
+                        if moduleName is None or moduleName == className:
+                            addIn = newAddIn(header,className,imports[classBase],component)
+                            addIns.append(addIn)
+                            state = "Class Implementation"
+                elif result.lastgroup == 'importName':
+                    if moduleName is None:
+                        imports.setdefault(result.group('importName'),result.group('importModule'))
+
+    if moduleName is None:
+        return addIns
+
+    if addIns:
+        return addIns[0]
+
+    return None
+
+'''
+The extraction engines, by name, each of which parses Python source into an AddIn model
+'''
+engines = {
+    'regex' : processInput,
+    'scan'  : scanInput,
+}
+
+def processFile(sourcePath,moduleName,engine='regex'):
+    '''
+    process the Python source file found at the given path with the given engine
+    '''
+    with traced('parse'):
+        with open(sourcePath,"r") as sourceFile:
+            return engines[engine](sourceFile,moduleName)
+
+def processFiles(sourcePaths,name,engine='regex'):
+    '''
+    process every add-in class of every Python source file given into the one Package
+    '''
+    addIns = []
+    for sourcePath in sourcePaths:
+        addIns.extend(processFile(sourcePath,None,engine))
+    return Package(name,addIns)
+
+def parseOptions(value,defaults):
+    '''
+    the options of a directive, such as size=<entries>, as a dictionary
+
+    Options not given take their defaults and options not understood are ignored.
+    An option is converted to the type of its default, or to float if that is None.
+    '''
+    options = dict(defaults)
+    for item in value.split():
+        work = list(map(strip,item.split('=')))
+        if len(work) != 2 or not work[0] in defaults:
+            continue
+        try:
+            options[work[0]] = type(defaults[work[0]] or 0.0)(work[1])
+        except ValueError:
+            pass
+    return options
+
+def parseCacheOptions(value):
+    '''
+    the options of a cache: directive, size=<entries> and ttl=<seconds>, as a dictionary
+    '''
+    return parseOptions(value,{'size': 128, 'ttl': None})
+
+def parseAsyncOptions(value):
+    '''
+    the options of an async: directive, workers=<threads>, size=<entries> and ttl=<seconds>, as a dictionary
+    '''
+    return parseOptions(value,{'workers': 4, 'size': 128, 'ttl': None})
+
+def parseRangeOptions(value):
+    '''
+    the options of a range: directive, the parameters to convert and as=<kind>, empty=<option>
+    and text=<option>, as a dictionary
+    '''
+    options = parseOptions(value,{'as': 'array', 'empty': 'nan', 'text': 'nan'})
+    options['parameters'] = [item for item in value.split() if not '=' in item]
+    return options
+
+def rangePositions(method):
+    '''
+    the positions of the parameters the method's range: directive converts
+
+    These are the parameters named or, if none are, those whose IDL type is a sequence of sequences.
+    '''
+    names = method.ranges['parameters']
+    if not names:
+        signature = parseSignature(method.idlSignature[0]) if method.idlSignature else None
+        if signature:
+            names = [parameter[2] for parameter in signature[2] if parameter[1].startswith('sequence<sequence<')]
+    return [index for index, name in enumerate(method.parameterNames) if name in names]
+
+def statisticsName(addIn):
+    '''
+    the name of the function that reports the add-in's statistics:  the class
+        name, its first letter lower case, and Stats, as in doobieDooStats
+
+    Calc knows add-in functions by name, so each add-in's must be its own.
+    '''
+    return addIn.moduleName[:1].lower() + addIn.moduleName[1:] + 'Stats'
+
+def withStatistics(model):
+    '''
+    a copy of the model with its functions instrumented, as the --stats option asks
+
+    The copy has one more function, named by statisticsName, which returns the
+    statistics of its functions gathered by the cappstats.py runtime as a table.
+    Each add-in of a Package has such a function of its own.
+    '''
+    if isinstance(model,Package):
+        return Package(model.name,[withStatistics(addIn) for addIn in model.addIns])
+
+    instrumented = copy.copy(model)
+    instrumented.methods = list(model.methods)
+    instrumented.stats = True
+
+    name = statisticsName(model)
+    method = Method(name,[])
+    method.description = "Returns the call counts and timings of the functions of " + model.moduleName
+    method.idlSignature.append('sequence< sequence< any > > %s ();' % name)
+    instrumented.methods.append(method)
+
+    return instrumented
+
+def withRecording(model):
+    '''
+    a copy of the model whose functions' calls may be recorded, as the --record option asks
+
+    The functions are not changed.  The calls to them are recorded by the
+    capprecord.py runtime, should the environment of soffice ask for it.
+    '''
+    if isinstance(model,Package):
+        return Package(model.name,[withRecording(addIn) for addIn in model.addIns])
+
+    recording = copy.copy(model)
+    recording.record = True
+    return recording
+
+def normaliseType(idlType):
+    '''
+    an IDL type written the one way, whatever the spacing:  sequence<sequence<double>>
+    '''
+    return re.sub(r'\s*([<>,])\s*',r'\1',' '.join(idlType.split()))
+
+def parseSignature(idlSignature):
+    '''
+    pick apart an IDL signature into its return type, name and parameters
+
+    The parameters are a list of (direction, type, name) tuples and types are
+    normalised.  The result is None if the signature is not understood.
+    '''
+    result = _reSignature.match(idlSignature)
+    if not result:
+        return None
+
+    parameters = []
+    for item in result.group(3).split(','):
+        if not item.strip():
+            continue
+        parameter = _reParameter.match(item)
+        if not parameter:
+            return None
+        parameters.append((parameter.group(1),normaliseType(parameter.group(2)),parameter.group(3)))
+
+    return normaliseType(result.group(1)), result.group(2), parameters
+
+def parseExceptions(idlSignature):
+    '''
+    the exceptions an IDL signature raises, as a list of types
+    '''
+    result = _reSignature.match(idlSignature)
+    if not result or not result.group(4):
+        return []
+    return [normaliseType(item) for item in result.group(4).split(',') if item.strip()]
+
+def idlSignatures(method):
+    '''
+    the method's IDL signatures as they are to be declared
+
+    The functions of async methods return com::sun::star::sheet::XVolatileResult
+    in place of the return type given.
+    '''
+    if method.asynchronous is None:
+        return method.idlSignature
+
+    signatures = []
+    for item in method.idlSignature:
+        result = _reSignature.match(item)
+        if result:
+            item = item[:result.start(1)] + 'com::sun::star::sheet::XVolatileResult' + item[result.end(1):]
+        signatures.append(item)
+    return signatures
+
+def idlIncludes(addIn):
+    '''
+    the IDL files to include for the qualified types, such as
+        com::sun::star::table::XCellRange, used in the add-in's signatures
+    '''
+    includes = set()
+    for method in addIn.methods:
+        for item in idlSignatures(method):
+            if not '::' in item:
+                continue
+            for name in _reQualified.findall(item):
+                includes.add(name.replace('::','/') + '.idl')
+    includes.discard('com/sun/star/uno/XInterface.idl')
+    return sorted(includes)
 
 def xmlGenerateDescription(unoModuleId,moduleVersion,displayName,publisherLink,publisherName):
     '''
     generate the XML description of the module`
     '''
-    print ('<?xml version="1.0" encoding="UTF-8"?>')
-    print ('<description xmlns="http://openoffice.org/extensions/description/2006"')
-    print ('  xmlns:d="http://openoffice.org/extensions/description/2006"')
-    print ('  xmlns:xlink="http://www.w3.org/1999/xlink">')
-    print ('')
-    print ('  <dependencies>')
-    print ('    <OpenOffice.org-minimal-version value="2.4" d:name="OpenOffice.org 2.4"/>')
-    print ('  </dependencies>')
-    print ('')
-    print ('  <identifier value="' + unoModuleId + '" />')
-    print ('  <version value="' + moduleVersion + '" />')
-    print ('  <display-name><name lang="en">' + displayName + '</name></display-name>')
+    lines = []
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<description xmlns="http://openoffice.org/extensions/description/2006"')
+    lines.append('  xmlns:d="http://openoffice.org/extensions/description/2006"')
+    lines.append('  xmlns:xlink="http://www.w3.org/1999/xlink">')
+    lines.append('')
+    lines.append('  <dependencies>')
+    lines.append('    <OpenOffice.org-minimal-version value="2.4" d:name="OpenOffice.org 2.4"/>')
+    lines.append('  </dependencies>')
+    lines.append('')
+    lines.append('  <identifier value="' + unoModuleId + '" />')
+    lines.append('  <version value="' + moduleVersion + '" />')
+    lines.append('  <display-name><name lang="en">' + displayName + '</name></display-name>')
     if publisherLink:
-        print ('  <publisher><name xlink:href="' + publisherLink + '" lang="en">' + publisherName + '</name></publisher>')
+        lines.append('  <publisher><name xlink:href="' + publisherLink + '" lang="en">' + publisherName + '</name></publisher>')
     else:
-        print ('  <publisher><name lang="en">' + publisherName + '</name></publisher>')
-    print ('')
-    print ('</description>')
+        lines.append('  <publisher><name lang="en">' + publisherName + '</name></publisher>')
+    lines.append('')
+    lines.append('</description>')
+    return '\n'.join(lines) + '\n'
 
-def idlGeneratePreamble(unoModuleId,interfaceName):
+def xmlGenerateManifest(rdbName,sourceNames,xcuName):
+    '''
+    generate the package manifest listing
+        the type library, the Python components and the configuration data
+    '''
+    fmtManifest = '    <manifest:file-entry manifest:media-type="application/vnd.sun.star.%s" manifest:full-path="%s"/>'
+
+    lines = []
+    lines.append('<manifest:manifest>')
+    lines.append(fmtManifest % ('uno-typelibrary;type=RDB', rdbName))
+    for sourceName in sourceNames:
+        lines.append(fmtManifest % ('uno-component;type=Python', sourceName))
+    lines.append(fmtManifest % ('configuration-data', xcuName))
+    lines.append('</manifest:manifest>')
+    return '\n'.join(lines) + '\n'
+
+def idlGeneratePreamble(unoModuleId,interfaceName,includes=()):
     '''
     generate the IDL file's head comprising
+        the includes for the types used and
         the interface clause declaration within the UNO module's namespace
     '''
-    print ('#include <com/sun/star/uno/XInterface.idl>')
-    print ('')
+    return idlGenerateIncludes(includes) + idlGenerateInterface(unoModuleId,interfaceName)
+
+def idlGenerateIncludes(includes=()):
+    '''
+    generate the includes for the types used, XInterface first
+    '''
+    lines = []
+    lines.append('#include <com/sun/star/uno/XInterface.idl>')
+    for item in includes:
+        lines.append('#include <' + item + '>')
+    return '\n'.join(lines) + '\n\n'
+
+def idlGenerateInterface(unoModuleId,interfaceName):
+    '''
+    generate the interface clause declaration within the UNO module's namespace
+    '''
+    lines = []
     for item in unoModuleId.split('.'):
-        print ('module ' + item + ' {'),
-    print ('')
-    print ('')
-    print ('    interface ' + interfaceName)
-    print ('    {')
+        lines.append('module ' + item + ' {')
+    lines.append('')
+    lines.append('')
+    lines.append('    interface ' + interfaceName)
+    lines.append('    {')
+    return '\n'.join(lines) + '\n'
 
 def idlGeneratePostamble(unoModuleId):
     '''
     generate the IDL file's tail comprising
         closing braces matching the open braces of the IDL file's head
     '''
-    print ('    };')
-    print ('')
+    lines = []
+    lines.append('    };')
+    lines.append('')
     for dummy in unoModuleId.split('.'):
-        print ('};'),
-    print ('')
+        lines.append('};')
+    lines.append('')
+    return '\n'.join(lines) + '\n'
 
 def idlGenerateSignature(idlSignature):
     '''
     generate the IDL signature for a Python method
         found in the comments documenting the method
     '''
+    lines = []
     for item in idlSignature:
-        print ('        ' + item)
+        lines.append('        ' + item + '\n')
+    return ''.join(lines)
 
 def xcuGeneratePreamble(unoComponentId):
     '''
     generate the XCU file's head including
         the identification of the magic UNO node of the Python component
     '''
-    print ('<?xml version="1.0" encoding="UTF-8"?>')
-    print ('<oor:component-data xmlns:oor="http://openoffice.org/2001/registry" xmlns:xs="http://www.w3.org/2001/XMLSchema" oor:name="CalcAddIns" oor:package="org.openoffice.Office">')
-    print ('  <node oor:name="AddInInfo">')
-    print ('    <node oor:name="' + unoComponentId + '" oor:op="replace">')
-    print ('      <node oor:name="AddInFunctions">')
+    return xcuGenerateHead() + xcuGenerateComponent(unoComponentId)
 
 def xcuGeneratePostamble():
     '''
     generate the XCU file's tail
         closing XML elements opened in the XCU file's head
     '''
-    print ('      </node>')
-    print ('    </node>')
-    print ('  </node>')
-    print ('</oor:component-data>')
+    return xcuGenerateComponentEnd() + xcuGenerateTail()
+
+def xcuGenerateHead():
+    '''
+    generate the XCU file's head, which opens the AddInInfo node
+    '''
+    lines = []
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<oor:component-data xmlns:oor="http://openoffice.org/2001/registry" xmlns:xs="http://www.w3.org/2001/XMLSchema" oor:name="CalcAddIns" oor:package="org.openoffice.Office">')
+    lines.append('  <node oor:name="AddInInfo">')
+    return '\n'.join(lines) + '\n'
+
+def xcuGenerateComponent(unoComponentId):
+    '''
+    generate the opening of the magic UNO node of a Python component and its functions
+    '''
+    lines = []
+    lines.append('    <node oor:name="' + unoComponentId + '" oor:op="replace">')
+    lines.append('      <node oor:name="AddInFunctions">')
+    return '\n'.join(lines) + '\n'
+
+def xcuGenerateComponentEnd():
+    '''
+    generate the closing of the magic UNO node of a Python component
+    '''
+    lines = []
+    lines.append('      </node>')
+    lines.append('    </node>')
+    return '\n'.join(lines) + '\n'
+
+def xcuGenerateTail():
+    '''
+    generate the XCU file's tail, which closes the AddInInfo node
+    '''
+    lines = []
+    lines.append('  </node>')
+    lines.append('</oor:component-data>')
+    return '\n'.join(lines) + '\n'
 
 def xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,parameterDescriptions):
     '''
@@ -223,44 +806,836 @@ def xcuGenerateNode(moduleName,methodName,methodDescription,parameterNames,param
         from comments documenting the method
     '''
     xlsName = 'AutoAddIn.' + moduleName + '.' + methodName
-    print ('        <node oor:name="' + methodName + '" oor:op="replace">')
-    print ('          <prop oor:name="DisplayName"><value xml:lang="en">' + methodName + '</value></prop>')
-    print ('          <prop oor:name="Description"><value xml:lang="en">' + methodDescription + '</value></prop>')
-    print ('          <prop oor:name="Category"><value>' + 'Add-In' + '</value></prop>')
-    print ('          <prop oor:name="CompatibilityName"><value xml:lang="en">' + xlsName + '</value></prop>')
-    print ('          <node oor:name="Parameters">')
+
+    lines = []
+    lines.append('        <node oor:name="' + methodName + '" oor:op="replace">')
+    lines.append('          <prop oor:name="DisplayName"><value xml:lang="en">' + methodName + '</value></prop>')
+    lines.append('          <prop oor:name="Description"><value xml:lang="en">' + methodDescription + '</value></prop>')
+    lines.append('          <prop oor:name="Category"><value>' + 'Add-In' + '</value></prop>')
+    lines.append('          <prop oor:name="CompatibilityName"><value xml:lang="en">' + xlsName + '</value></prop>')
+    lines.append('          <node oor:name="Parameters">')
 
     for name in parameterNames:
-        print ('            <node oor:name="' + name +'" oor:op="replace">')
-        print ('              <prop oor:name="DisplayName"><value xml:lang="en">' + name + '</value></prop>')
-        print ('              <prop oor:name="Description"><value xml:lang="en">' + parameterDescriptions[name] + '</value></prop>')
-        print ('            </node>')
+        lines.append('            <node oor:name="' + name +'" oor:op="replace">')
+        lines.append('              <prop oor:name="DisplayName"><value xml:lang="en">' + name + '</value></prop>')
+        lines.append('              <prop oor:name="Description"><value xml:lang="en">' + parameterDescriptions.get(name,'') + '</value></prop>')
+        lines.append('            </node>')
 
-    print ('          </node>')
-    print ('        </node>')
+    lines.append('          </node>')
+    lines.append('        </node>')
+    return '\n'.join(lines) + '\n'
 
+def sourceNames(model):
+    '''
+    the names of the Python sources of the add-ins, each once, in the order first found
+    '''
+    names = []
+    for addIn in asPackage(model).addIns:
+        if not addIn.sourceName in names:
+            names.append(addIn.sourceName)
+    return names
+
+def idlGenerate(model):
+    '''
+    generate the IDL file declaring the interface of each add-in
+    '''
+    package = asPackage(model)
+    includes = set()
+    for addIn in package.addIns:
+        includes.update(idlIncludes(addIn))
+
+    parts = [idlGenerateIncludes(sorted(includes))]
+    for addIn in package.addIns:
+        parts.append(idlGenerateInterface(addIn.unoModuleId,addIn.interfaceName))
+        for method in addIn.methods:
+            parts.append(idlGenerateSignature(idlSignatures(method)))
+        parts.append(idlGeneratePostamble(addIn.unoModuleId))
+    return ''.join(parts)
+
+def xcuGenerate(model):
+    '''
+    generate the XCU file describing the functions of each add-in
+    '''
+    parts = [xcuGenerateHead()]
+    for addIn in asPackage(model).addIns:
+        parts.append(xcuGenerateComponent(addIn.unoComponentId))
+        for method in addIn.methods:
+            parts.append(xcuGenerateNode(addIn.moduleName,method.name,method.description,method.parameterNames,method.parameterDescriptions))
+        parts.append(xcuGenerateComponentEnd())
+    parts.append(xcuGenerateTail())
+    return ''.join(parts)
+
+def xmlGenerate(model):
+    '''
+    generate the XML description of the package, which is that of its first add-in
+    '''
+    addIn = asPackage(model).addIns[0]
+    return xmlGenerateDescription(addIn.unoModuleId,addIn.moduleVersion,addIn.displayName,addIn.publisherLink,addIn.publisherName)
+
+def manifestGenerate(model):
+    '''
+    generate the manifest of the package
+    '''
+    package = asPackage(model)
+    return xmlGenerateManifest(package.typesName + '.rdb',sourceNames(package),package.name + '.xcu')
+
+def jsonGenerate(model):
+    '''
+    generate a json dump of the add-in model, or of the package model
+    '''
+    return json.dumps(model.asDict(),indent=4,sort_keys=True) + '\n'
+
+'''
+The generators, by target, each of which renders an AddIn or Package model as a string
+'''
+generators = {
+    'idl'      : idlGenerate,
+    'xcu'      : xcuGenerate,
+    'xml'      : xmlGenerate,
+    'manifest' : manifestGenerate,
+    'json'     : jsonGenerate,
+}
+
+def rdbGenerate(model):
+    '''
+    generate the type library declaring the interface of each add-in, as bytes,
+        without the SDK
+    '''
+    import rdb
+
+    interfaces = []
+    for addIn in asPackage(model).addIns:
+        methods = []
+        for method in addIn.methods:
+            for item in idlSignatures(method):
+                signature = parseSignature(item)
+                if signature is None:
+                    raise ValueError('I do not understand the IDL signature "%s"' % item.strip())
+                returnType, name, parameters = signature
+                methods.append((name, returnType, parameters, parseExceptions(item)))
+        interfaces.append(rdb.Interface(addIn.unoModuleId + '.' + addIn.interfaceName,methods))
+    return rdb.rdbBytes(interfaces)
+
+def generate(model,target):
+    '''
+    generate the contents of the given target
+    '''
+    with traced('render'):
+        return generators[target](model)
+
+def packageFiles(model):
+    '''
+    generate the contents of every file the package needs, bar two
+
+    The result maps pathnames within the package to UTF-8 encoded contents.
+    The Python sources and the type library built from the IDL are not included.
+    '''
+    package = asPackage(model)
+    with traced('render'):
+        return {
+            package.typesName + '.idl' : idlGenerate(package).encode('utf-8'),
+            package.name + '.xcu'      : xcuGenerate(package).encode('utf-8'),
+            'description.xml'          : xmlGenerate(package).encode('utf-8'),
+            'META-INF/manifest.xml'    : manifestGenerate(package).encode('utf-8'),
+        }
+
+def writePackageFiles(model,outputDir):
+    '''
+    write the files generated by packageFiles into the output directory
+    '''
+    for name, content in packageFiles(model).items():
+        path = os.path.join(outputDir,*name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path,"wb") as output:
+            output.write(content)
+
+def wiring(model):
+    '''
+    generate the Python that wires the add-ins up to the runtime modules they need
+
+    This is appended to the Python source of the add-ins to make the packaged
+    component.  It is empty if the add-ins need no runtime modules.
+    '''
+    lines = []
+    for addIn in asPackage(model).addIns:
+        for method in addIn.methods:
+            if method.ranges is not None:
+                lines.append('cappranges.convert (%s, %r, %r, kind=%r, empty=%r, text=%r)' % (addIn.moduleName, method.name, rangePositions(method), method.ranges['as'], method.ranges['empty'], method.ranges['text']))
+            if method.asynchronous is not None:
+                lines.append('cappasync.asynchronous (%s, %r, workers=%r, size=%r, ttl=%r)' % (addIn.moduleName, method.name, method.asynchronous['workers'], method.asynchronous['size'], method.asynchronous['ttl']))
+            if method.cache is not None:
+                lines.append('cappcache.memoise (%s, %r, size=%r, ttl=%r)' % (addIn.moduleName, method.name, method.cache['size'], method.cache['ttl']))
+
+        statistics = statisticsName(addIn) if addIn.stats else None
+        names = [method.name for method in addIn.methods if method.name != statistics]
+
+        if addIn.stats:
+            lines.append('cappstats.instrument (%s, %r, %r)' % (addIn.moduleName, names, statistics))
+
+        if addIn.record:
+            lines.append('capprecord.record (%s, %r)' % (addIn.moduleName, names))
+
+    if not lines:
+        return ''
+
+    lines.insert(0,'import ' + ', '.join(runtimeModules(model)))
+    lines.insert(0,"'''\nWiring generated by capp.py from the method descriptions\n'''")
+    return '\n' + '\n'.join(lines) + '\n'
+
+def runtimeModules(model):
+    '''
+    the names of the runtime modules, packaged beside capp.py, the add-ins need
+    '''
+    addIns  = asPackage(model).addIns
+    methods = [method for addIn in addIns for method in addIn.methods]
+
+    modules = []
+    if any(method.cache is not None or method.asynchronous is not None for method in methods):
+        modules.append('cappcache')
+    if any(method.asynchronous is not None for method in methods):
+        modules.append('cappasync')
+    if any(method.ranges is not None for method in methods):
+        modules.append('cappranges')
+    if any(addIn.stats for addIn in addIns):
+        modules.append('cappstats')
+    if any(addIn.record for addIn in addIns):
+        modules.append('capprecord')
+    return modules
+
+def implementationName(sourceName):
+    '''
+    the name of the module that implements the add-ins of a lazily loaded Python source
+    '''
+    return os.path.splitext(sourceName)[0] + '_impl'
+
+def stubGenerate(model,bytecode=False):
+    '''
+    generate the thin registration stub of lazily loaded add-ins from one Python source
+
+    The stub registers each component and implements its interface by forwarding
+    each call to an instance of the add-in class.  The module that implements them,
+    with its imports, is imported only when a function is first called.
+    '''
+    addIns = asPackage(model).addIns
+    implementation = implementationName(addIns[0].sourceName)
+
+    lines = []
+    lines.append("'''")
+    lines.append(addIns[0].displayName)
+    lines.append('')
+    lines.append('Registration stub generated by capp.py:  the implementation is in')
+    lines.append('pythonpath/' + implementation + ('.pyc' if bytecode else '.py') + ' and is imported when first needed.')
+    lines.append("'''")
+    lines.append('')
+    lines.append('import threading')
+    lines.append('import unohelper')
+    for addIn in addIns:
+        lines.append('from ' + addIn.unoModuleId + ' import ' + addIn.interfaceName)
+    lines.append('')
+    lines.append('_lock = threading.Lock()')
+    for addIn in addIns:
+        lines.append('')
+        lines.append('class ' + addIn.moduleName + ' (unohelper.Base, ' + addIn.interfaceName + '):')
+        lines.append('    def __init__ (self, ctx):')
+        lines.append('        self.ctx = ctx')
+        lines.append('        self._instance = None')
+        lines.append('')
+        lines.append('    def _implementation (self):')
+        lines.append('        if self._instance is None:')
+        lines.append('            with _lock:')
+        lines.append('                if self._instance is None:')
+        lines.append('                    import ' + implementation)
+        lines.append('                    self._instance = ' + implementation + '.' + addIn.moduleName + ' (self.ctx)')
+        lines.append('        return self._instance')
+        for method in addIn.methods:
+            lines.append('')
+            lines.append('    def ' + method.name + ' (self, *args):')
+            lines.append('        return self._implementation().' + method.name + ' (*args)')
+    lines.append('')
+    lines.append('g_ImplementationHelper = unohelper.ImplementationHelper()')
+    for addIn in addIns:
+        lines.append('g_ImplementationHelper.addImplementation (')
+        lines.append('    ' + addIn.moduleName + ', "' + addIn.unoComponentId + '", ("com.sun.star.sheet.AddIn",) )')
+    lines.append('')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+def importerGenerate(model):
+    '''
+    generate the component of add-ins from one Python source packaged as bytecode
+
+    The component imports no more than the registrations of the add-ins from the
+    module that implements them, which is compiled in the pythonpath directory.
+    '''
+    addIns = asPackage(model).addIns
+    implementation = implementationName(addIns[0].sourceName)
+
+    lines = []
+    lines.append("'''")
+    lines.append(addIns[0].displayName)
+    lines.append('')
+    lines.append('Component generated by capp.py:  the implementation is compiled in')
+    lines.append('pythonpath/' + implementation + '.pyc for the Python it was packaged with.')
+    lines.append("'''")
+    lines.append('')
+    lines.append('from ' + implementation + ' import g_ImplementationHelper')
+    lines.append('')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+def _isDocstring(statement):
+    '''
+    whether the statement, the first of a body, is a docstring
+    '''
+    if not isinstance(statement,ast.Expr):
+        return False
+    value = statement.value
+    if value.__class__.__name__ == 'Str':
+        return True
+    return value.__class__.__name__ == 'Constant' and isinstance(value.value,str)
+
+def stripDocstrings(tree):
+    '''
+    remove the docstrings of the module, classes and functions of a syntax tree, in place
+
+    A body left empty is given a pass statement in its stead.
+    '''
+    for node in ast.walk(tree):
+        body = getattr(node,'body',None)
+        if not isinstance(body,list) or not body or not _isDocstring(body[0]):
+            continue
+        if not isinstance(node,(ast.Module, ast.ClassDef, ast.FunctionDef, getattr(ast,'AsyncFunctionDef',ast.FunctionDef))):
+            continue
+        if len(body) == 1:
+            body[0] = ast.copy_location(ast.Pass(),body[0])
+        else:
+            del body[0]
+    return tree
+
+def compileModule(source,name):
+    '''
+    the Python source, given as bytes, compiled without its docstrings as the contents of a .pyc file
+
+    Asserts are kept.  The bytecode is that of the Python running this script, which
+    must be the Python of the LibreOffice the package is for:  another version of
+    Python refuses to import it.  The modification time recorded is 0, as the
+    file is imported without its source and so reproducibly packaged.
+    '''
+    import marshal, struct
+    try:
+        from importlib.util import MAGIC_NUMBER as magic
+    except ImportError:
+        import imp
+        magic = imp.get_magic()
+
+    code = compile(stripDocstrings(ast.parse(source,name)),name,'exec',dont_inherit=True)
+    if sys.version_info >= (3,7):
+        header = magic + struct.pack('<III',0,0,len(source))
+    else:
+        header = magic + struct.pack('<II',0,len(source))
+    return header + marshal.dumps(code)
+
+def componentFiles(model,sources,lazy=False,bytecode=False):
+    '''
+    the Python files of the package as a dictionary of names and contents
+
+    These are the packaged components, which are the Python sources, given as bytes
+    by name, plus any wiring, and the runtime modules they need in the pythonpath
+    directory.  If lazy, each packaged component is a registration stub instead and
+    the wired Python source is in the pythonpath directory with the runtime modules.
+    If bytecode, the wired Python source is in the pythonpath directory anyway and,
+    like the runtime modules, compiled by compileModule, and each component, unless
+    lazy, imports its registrations from there.
+    '''
+    package = asPackage(model)
+
+    def module(name,source):
+        if bytecode:
+            files['pythonpath/' + name + '.pyc'] = compileModule(source,name + '.py')
+        else:
+            files['pythonpath/' + name + '.py'] = source
+
+    files = {}
+    for sourceName in sourceNames(package):
+        component = Package(package.name,[addIn for addIn in package.addIns if addIn.sourceName == sourceName])
+        source = sources[sourceName]
+        extra = wiring(component)
+        if extra and not source.endswith(b'\n'):
+            source += b'\n'
+        if lazy:
+            files[sourceName] = stubGenerate(component,bytecode).encode('utf-8')
+            module(implementationName(sourceName),source + extra.encode('utf-8'))
+        elif bytecode:
+            files[sourceName] = importerGenerate(component).encode('utf-8')
+            module(implementationName(sourceName),source + extra.encode('utf-8'))
+        else:
+            files[sourceName] = source + extra.encode('utf-8')
+
+    for name in runtimeModules(package):
+        module(name,readBytes(os.path.join(os.path.dirname(os.path.abspath(__file__)),name + '.py')))
+    return files
+
+def oxtMembers(model,sources,rdb,lazy=False,bytecode=False):
+    '''
+    the members of the oxt package as a dictionary of names and contents
+
+    These are the files packageFiles generates, bar the IDL, plus the files
+    componentFiles generates from the Python sources, given as bytes by name,
+    and the type library, given as bytes.  If lazy, the components are
+    registration stubs and, if bytecode, the Python modules are compiled.
+    '''
+    package = asPackage(model)
+    members = packageFiles(package)
+    del members[package.typesName + '.idl']
+    with traced('components'):
+        members.update(componentFiles(package,sources,lazy,bytecode))
+    members[package.typesName + '.rdb'] = rdb
+    return members
+
+def readBytes(path):
+    '''
+    the contents of a file as bytes
+    '''
+    with open(path,"rb") as input:
+        return input.read()
+
+def report(message):
+    '''
+    write a line to standard output at once, for the benefit of whoever is reading it
+    '''
+    sys.stdout.write(message + '\n')
+    sys.stdout.flush()
+
+class PipelineError(Exception):
+    '''
+    the failure of a step of a pipeline, naming the step
+    '''
+    def __init__(self,step,message):
+        Exception.__init__(self,step + ' - ' + message)
+        self.step = step
+
+def pipeline(steps,workers=4,log=report):
+    '''
+    run the steps, each as soon as those it depends on have finished, several at once
+
+    Steps are (name, dependencies, function) triples.  The function is called with
+    a dictionary of the results of the steps finished so far and returns the result
+    of its step.  A line is logged as each step finishes.  Should a step fail, no
+    more are started and, once those running have finished, a PipelineError is
+    raised.  Otherwise the results are returned as a dictionary by step name.
+    '''
+    import concurrent.futures, time
+
+    def timed(name,function,results):
+        with traced(name,'build'):
+            start = time.time()
+            return function(results), time.time() - start
+
+    results = {}
+    waiting = list(steps)
+    running = {}
+    failure = None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            if failure is None:
+                for step in [step for step in waiting if all(name in results for name in step[1])]:
+                    waiting.remove(step)
+                    running[pool.submit(timed,step[0],step[2],dict(results))] = step[0]
+            if not running:
+                break
+
+            finished, unfinished = concurrent.futures.wait(running,return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    results[name], elapsed = future.result()
+                    log("%-8s %-8s %7.3fs" % (name, "ok", elapsed))
+                except Exception as error:
+                    log("%-8s %-8s %s" % (name, "FAILED", error))
+                    failure = failure or PipelineError(name,str(error))
+
+    if failure:
+        raise failure
+    if waiting:
+        raise PipelineError(waiting[0][0],'it depends on a step that never ran')
+    return results
+
+def sdkCommands(liboroot,idlName,rdbName):
+    '''
+    the commands that build the type library from the IDL with the idlc and
+        regmerge of the LibreOffice installed in liboroot, in their directory
+
+    Each is a list of arguments, to be run without a shell.
+    '''
+    urdName = os.path.splitext(idlName)[0] + '.urd'
+    return [
+        ['rm', '-f', urdName, rdbName],
+        [os.path.join(liboroot,'sdk','bin','idlc'), '-w', '-I', os.path.join(liboroot,'sdk','idl'), idlName],
+        [os.path.join(liboroot,'program','regmerge'), rdbName, '/UCR', urdName],
+    ]
+
+def typesCommands(typesCommand):
+    '''
+    the types command as a list of commands:  a shell command line, as --types
+        gives, is one command, while sdkCommands gives several lists of arguments
+    '''
+    return [typesCommand] if isinstance(typesCommand,str) else typesCommand
+
+def build(model,sources,oxtFile,rdbFile,typesCommand=None,timestamp=None,order=None,compression=9,lazy=False,bytecode=False,log=report):
+    '''
+    package the add-in, running the steps that do not depend on each other at once
+
+    The steps are idl, which writes the IDL beside the type library, types, which runs
+    the types command in that directory to build the type library from the IDL, files,
+    which generates every other file of the package, and oxt, which writes the package
+    once the type library and the files are ready.  So the files are generated while
+    the SDK tools run.  The types command may be a shell command line or a list of
+    commands (see typesCommands).  Without a types command, rdbGenerate writes the type library.
+    The type library is built again only if the IDL has changed or the type library
+    is missing, so it is removed before rdbGenerate writes it lest a failure leave
+    the old one beside the new IDL.  Sources are given as bytes by name.
+    '''
+    import oxt, subprocess
+
+    package  = asPackage(model)
+    buildDir = os.path.dirname(rdbFile) or '.'
+    idlName  = package.typesName + '.idl'
+
+    def idl(results):
+        content = idlGenerate(package).encode('utf-8')
+        idlPath = os.path.join(buildDir,idlName)
+        if os.path.exists(rdbFile) and os.path.exists(idlPath) and readBytes(idlPath) == content:
+            return False
+        with open(idlPath,"wb") as output:
+            output.write(content)
+        return True
+
+    def types(results):
+        if not results['idl']:
+            return ''
+        if typesCommand is None:
+            if os.path.exists(rdbFile):
+                os.remove(rdbFile)
+            with traced('rdb'):
+                data = rdbGenerate(package)
+            with open(rdbFile,"wb") as output:
+                output.write(data)
+            return ''
+        output = ''
+        for command in typesCommands(typesCommand):
+            process = subprocess.Popen(command,shell=isinstance(command,str),cwd=buildDir,stdout=subprocess.PIPE,stderr=subprocess.STDOUT)
+            text = process.communicate()[0].decode('utf-8','replace')
+            for line in text.splitlines():
+                log("    " + line)
+            output += text
+            if process.returncode != 0:
+                raise Exception("cannot build the type library from " + idlName)
+        return output
+
+    def files(results):
+        members = packageFiles(package)
+        del members[idlName]
+        with traced('components'):
+            members.update(componentFiles(package,sources,lazy,bytecode))
+        return members
+
+    def write(results):
+        members = dict(results['files'])
+        members[package.typesName + '.rdb'] = readBytes(rdbFile)
+        with traced('zip'):
+            oxt.writeOxt(oxtFile,members,timestamp,order,compression)
+
+    return pipeline([
+        ('idl',   [],                 idl),
+        ('types', ['idl'],            types),
+        ('files', [],                 files),
+        ('oxt',   ['types', 'files'], write),
+    ],log=log)
+
+def watch(sourcePath,moduleName,oxtFile,rdbFile,typesCommand=None,engine='regex',interval=0.25,timestamp=None,order=None,compression=9,stats=False,lazy=False,record=False,bytecode=False):
+    '''
+    watch the Python source file, packaging the add-in again whenever it changes
+
+    The IDL is written beside the type library and, whenever it changes, the types
+    command is run in that directory to build the type library again or, without one,
+    rdbGenerate writes the type library.  The package is
+    written again whenever anything in it changes.  A line is reported for each package
+    written, naming the files that changed.  Watching continues until interrupted.
+    '''
+    import oxt, subprocess, time
+
+    buildDir = os.path.dirname(rdbFile) or '.'
+    idlName  = 'X' + moduleName + '.idl'
+    previous = {}
+    modified = None
+
+    if os.path.exists(rdbFile) and os.path.exists(os.path.join(buildDir,idlName)):
+        previous[idlName] = readBytes(os.path.join(buildDir,idlName))
+
+    while True:
+        try:
+            status = os.stat(sourcePath)
+        except OSError:
+            status = None
+
+        if status is None or (status.st_mtime, status.st_size) == modified:
+            time.sleep(interval)
+            continue
+
+        modified = (status.st_mtime, status.st_size)
+
+        addIn = processFile(sourcePath,moduleName,engine)
+        if addIn is None:
+            report("cannot find the add-in " + moduleName + " in " + sourcePath)
+            continue
+
+        if stats:
+            addIn = withStatistics(addIn)
+        if record:
+            addIn = withRecording(addIn)
+
+        members = packageFiles(addIn)
+        members.update(componentFiles(addIn,{addIn.sourceName: readBytes(sourcePath)},lazy,bytecode))
+        changed = sorted(name for name in members if previous.get(name) != members[name])
+        if not changed:
+            continue
+
+        if idlName in changed:
+            with open(os.path.join(buildDir,idlName),"wb") as output:
+                output.write(members[idlName])
+            if typesCommand is None:
+                if os.path.exists(rdbFile):
+                    os.remove(rdbFile)
+                try:
+                    data = rdbGenerate(addIn)
+                except ValueError as error:
+                    report("cannot build the type library - " + str(error))
+                    continue
+                with open(rdbFile,"wb") as output:
+                    output.write(data)
+            elif any(subprocess.call(command,shell=isinstance(command,str),cwd=buildDir) != 0 for command in typesCommands(typesCommand)):
+                report("cannot build the type library from " + idlName)
+                continue
+
+        package = dict(members)
+        del package[idlName]
+        package[addIn.interfaceName + '.rdb'] = readBytes(rdbFile)
+        with traced('zip'):
+            oxt.writeOxt(oxtFile,package,timestamp,order,compression)
+
+        previous = members
+        report("packaged " + oxtFile + " after changes to " + ' '.join(changed))
+
+def startTrace(path,target):
+    '''
+    trace the steps the script takes, appending them to the trace file on exit
+
+    Should CAPP_TRACE_START give the time, in microseconds since the epoch, at
+    which the script was started, the time taken to start Python is traced too.
+    '''
+    import atexit, capptrace
+    global tracer
+
+    tracer = capptrace.Tracer(path,'capp.py ' + target)
+    if os.environ.get('CAPP_TRACE_START'):
+        tracer.add('startup','capp',int(os.environ['CAPP_TRACE_START']),capptrace.now())
+    atexit.register(tracer.write)
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
 
-if sys.argv[0].find('pydoc') ==  -1:
     '''
     Recognise the first argument
     '''
+    targets = ['idl', 'xcu', 'xml', 'manifest', 'json', 'rdb', 'all', 'oxt', 'build', 'watch', 'serve']
+
+    if len(argv) < 2 or not argv[1] in targets:
+        print ("I need to know what to generate - my first argument must be one of " + str(targets))
+        return 1
 
-    if not sys.argv[1] in ['idl', 'xcu', 'xml']:
-        print ("I need to know what to generate - my first argument must be one of ['idl', 'xcu', 'xml']")
-        sys.exit(1)
+    if argv[1] == 'serve':
+        import cappserve
+        try:
+            options, arguments = getopt.getopt(argv[2:], '', ['socket=', 'sdk='])
+        except getopt.GetoptError as error:
+            print ("I do not understand my options - " + str(error))
+            return 1
+        options = dict(options)
+        return cappserve.serve(sys.modules[__name__],options.get('--socket',cappserve.defaultSocket()),options.get('--sdk'))
 
     '''
-    Open the python source file
+    Recognise the options that follow the module name and source file, and any more source files
     '''
     try:
-        sourceFile = open(sys.argv[3],"r")
-    except:
+        options, arguments = getopt.gnu_getopt(argv[4:], 'o:', ['rdb=', 'timestamp=', 'compression=', 'order=', 'engine=', 'types=', 'sdk=', 'interval=', 'trace=', 'stats', 'record', 'lazy', 'bytecode', 'bundle'])
+    except getopt.GetoptError as error:
+        print ("I do not understand my options - " + str(error))
+        return 1
+
+    outputDir   = None
+    rdbFile     = None
+    timestamp   = None
+    compression = 9
+    order       = []
+    engine      = 'regex'
+    types       = None
+    sdk         = None
+    interval    = 0.25
+    stats       = False
+    record      = False
+    lazy        = False
+    bytecode    = False
+    bundle      = False
+    trace       = None
+    for option, value in options:
+        if option == '-o':
+            outputDir = value
+        elif option == '--rdb':
+            rdbFile = value
+        elif option == '--timestamp':
+            timestamp = int(value)
+        elif option == '--compression':
+            compression = int(value)
+        elif option == '--order':
+            order = value.split(',')
+        elif option == '--engine':
+            engine = value
+        elif option == '--types':
+            types = value
+        elif option == '--sdk':
+            sdk = value
+        elif option == '--interval':
+            interval = float(value)
+        elif option == '--stats':
+            stats = True
+        elif option == '--record':
+            record = True
+        elif option == '--lazy':
+            lazy = True
+        elif option == '--bytecode':
+            bytecode = True
+        elif option == '--bundle':
+            bundle = True
+        elif option == '--trace':
+            trace = value
+
+    if trace:
+        startTrace(trace,argv[1])
+
+    if not engine in engines:
+        print ("I do not know that engine - the --engine option must be one of " + str(sorted(engines)))
+        return 1
+
+    if argv[1] == 'all' and not outputDir:
+        print ("I need to know where to put everything - all requires the -o <directory> option")
+        return 1
+
+    if argv[1] == 'oxt' and not (outputDir and rdbFile):
+        print ("I need to know what to package and where - oxt requires the -o <oxt> and --rdb <rdb> options")
+        return 1
+
+    if argv[1] == 'rdb' and not outputDir:
+        print ("I need to know where to put the type library - rdb requires the -o <rdb> option")
+        return 1
+
+    if argv[1] == 'build' and not (outputDir and rdbFile):
+        print ("I need to know what to build - build requires the -o <oxt> and --rdb <rdb> options")
+        return 1
+
+    if types and sdk:
+        print ("I need to know how to build the type library - give the --types or the --sdk option, not both")
+        return 1
+
+    if arguments and not bundle:
+        print ("I need to know what to do with more than one source file - package them together with the --bundle option")
+        return 1
+
+    sourcePaths = argv[3:4] + arguments
+    if len(set(os.path.basename(path) for path in sourcePaths)) != len(sourcePaths):
+        print ("I need source files with different names - they are packaged side by side")
+        return 1
+
+    if argv[1] == 'watch':
+        if bundle:
+            print ("I can watch only one add-in - watch does not take the --bundle option")
+            return 1
+        if len(argv) < 4 or not (outputDir and rdbFile):
+            print ("I need to know what to watch and what to do - watch requires the -o <oxt> and --rdb <rdb> options")
+            return 1
+        if sdk:
+            types = sdkCommands(sdk,'X' + argv[2] + '.idl',os.path.basename(rdbFile))
+        try:
+            watch(argv[3],argv[2],outputDir,rdbFile,types,engine,interval,timestamp,order,compression,stats,lazy,record,bytecode)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    '''
+    Preprocess the python source files ...
+    '''
+    try:
+        if bundle:
+            model = processFiles(sourcePaths,argv[2],engine)
+        else:
+            model = processFile(argv[3],argv[2],engine)
+    except (IndexError, IOError):
         print ("I need a python module to process - the module name and the path to the module's implementation")
-        sys.exit(1)
+        return 1
+
+    if model is None or bundle and not model.addIns:
+        if argv[1] in ('all', 'oxt', 'rdb', 'build'):
+            print ("I cannot find the add-in " + argv[2] + " in " + ', '.join(sourcePaths))
+            return 1
+        return 0
+
+    if stats:
+        model = withStatistics(model)
+    if record:
+        model = withRecording(model)
 
     '''
-    Preprocess the python source file ...
+    ... and write out what was asked for
     '''
-    processInput(sourceFile,sys.argv[2],sys.argv[1]).close()
+    if argv[1] == 'all':
+        writePackageFiles(model,outputDir)
+    elif argv[1] == 'oxt':
+        import oxt
+        try:
+            sources = dict((os.path.basename(path), readBytes(path)) for path in sourcePaths)
+            members = oxtMembers(model,sources,readBytes(rdbFile),lazy,bytecode)
+        except IOError:
+            print ("I need a type library to package - the --rdb option must name one built from the IDL")
+            return 1
+        with traced('zip'):
+            oxt.writeOxt(outputDir,members,timestamp,order,compression)
+    elif argv[1] == 'rdb':
+        try:
+            with traced('rdb'):
+                data = rdbGenerate(model)
+        except ValueError as error:
+            print (str(error))
+            return 1
+        with open(outputDir,"wb") as output:
+            output.write(data)
+    elif argv[1] == 'build':
+        sources = dict((os.path.basename(path), readBytes(path)) for path in sourcePaths)
+        if sdk:
+            types = sdkCommands(sdk,asPackage(model).typesName + '.idl',os.path.basename(rdbFile))
+        try:
+            build(model,sources,outputDir,rdbFile,types,timestamp,order,compression,lazy,bytecode)
+        except PipelineError as error:
+            print ("I failed to build the package - " + str(error))
+            return 1
+    else:
+        sys.stdout.write(generate(model,argv[1]))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
 
 # EOF
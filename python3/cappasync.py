@@ -0,0 +1,129 @@
+'''
+Calc Add-In Asynchronous Functions for Python 3.x.x
+
+An add-in function that takes seconds blocks calc while it runs.  This
+module is the runtime behind the async: directive of capp.py.  It runs such
+a function on a pool of threads and returns at once a volatile result that
+calc shows as pending until the function finishes and the result is pushed.
+
+A method opts in with a line in its multi-line description of the form:
+
+    async: [workers=<threads>] [size=<entries>] [ttl=<seconds>]
+
+where workers bounds the number of calls that run at once (default: 4),
+size bounds the number of results kept (default: 128), the least recently
+used being forgotten first, and ttl bounds how long a result is kept
+(default: for ever), after which the next call runs the function again.
+The method's idl: line gives the return type of the method itself; capp.py
+declares the function as returning com::sun::star::sheet::XVolatileResult
+instead.
+
+Calc asks for the result of a function again each time it recalculates.
+Calls with the same arguments share the one volatile result, so the
+function runs once and every cell with that call is updated together.
+Should the function raise an exception, the result is its message and it
+is not kept, so the next call with the same arguments runs the function
+again.  Calls with arguments that cannot be hashed each have a volatile
+result of their own.
+
+The packaged component wires the pool up by calling asynchronous on the
+add-in class and this module, with cappcache.py, is packaged in the
+pythonpath directory of the oxt.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import threading
+import concurrent.futures
+
+import unohelper
+from com.sun.star.sheet import XVolatileResult, ResultEvent
+
+import cappcache
+
+'''
+What calc shows while a result is pending
+'''
+pending = '#PENDING'
+
+class VolatileResult(unohelper.Base, XVolatileResult):
+    '''
+    a result that calc is told of when it is ready, pending until then
+    '''
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.listeners = []
+        self.value     = pending
+
+    def event(self,value):
+        result = ResultEvent()
+        result.Source = self
+        result.Value  = value
+        return result
+
+    def addResultListener(self,listener):
+        with self.lock:
+            self.listeners.append(listener)
+            value = self.value
+        listener.modified(self.event(value))
+
+    def removeResultListener(self,listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def push(self,value):
+        '''
+        set the result and tell every listener
+        '''
+        with self.lock:
+            self.value = value
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener.modified(self.event(value))
+
+def asynchronous(cls,name,workers=4,size=128,ttl=None):
+    '''
+    replace the named method of the add-in class with one that runs on a pool of threads
+
+    The replacement returns a VolatileResult at once.  Results are shared by
+    every instance of the class.
+    '''
+    function = getattr(cls,name)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    results = cappcache.LRUCache(size,ttl)
+    lock = threading.Lock()
+
+    def finished(args,result,future):
+        try:
+            result.push(future.result())
+        except Exception as error:
+            try:
+                results.discard(args,result)
+            except TypeError:
+                pass
+            result.push(str(error))
+
+    def started(self,*args):
+        result = VolatileResult()
+        try:
+            with lock:
+                shared, found = results.get(args)
+                if found:
+                    return shared
+                results.put(args,result)
+        except TypeError:
+            pass
+        pool.submit(function,self,*args).add_done_callback(lambda future: finished(args,result,future))
+        return result
+
+    started.__name__ = function.__name__
+    started.__doc__  = function.__doc__
+    started.pool     = pool
+    setattr(cls,name,started)
+    return started
+
+# EOF
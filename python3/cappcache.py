@@ -0,0 +1,142 @@
+'''
+Calc Add-In Cache for Python 3.x.x
+
+Calc calls add-in functions again whenever it recalculates, very often with
+the same arguments as before.  This module is the runtime behind the cache:
+directive of capp.py.  It keeps the results of recent calls so a repeated
+call returns at once without calling the add-in function again.
+
+A method opts in with a line in its multi-line description of the form:
+
+    cache: [size=<entries>] [ttl=<seconds>]
+
+where size bounds the number of results kept (default: 128), the least
+recently used being evicted first, and ttl bounds how long a result is kept
+(default: for ever).  Only pure functions, whose results depend on nothing
+but their arguments, should be cached.
+
+The packaged component wires the cache up by calling memoise on the add-in
+class and this module is packaged in the pythonpath directory of the oxt.
+Calls with arguments that cannot be hashed are not cached.  Each method of
+each class has a cache of its own, known by the qualified name of the method:
+its class's module, the class and the method.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import collections, threading, time
+
+class LRUCache(object):
+    '''
+    a bounded map from keys to values that forgets the least recently used first
+
+    Entries older than the ttl, if there is one, are forgotten when next looked up.
+    The hits, misses, evictions and expirations are counted.
+    '''
+    def __init__(self,size=128,ttl=None):
+        self.size        = size
+        self.ttl         = ttl
+        self.lock        = threading.Lock()
+        self.entries     = collections.OrderedDict()
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self.expirations = 0
+
+    def get(self,key):
+        '''
+        the value for the key and True, or None and False if there is none
+        '''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self.ttl is None or time.monotonic() - entry[1] < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], True
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None, False
+
+    def put(self,key,value):
+        '''
+        remember the value for the key, forgetting the least recently used if full
+        '''
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self,key,value):
+        '''
+        forget the entry for the key, should it still be the value
+        '''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is value:
+                del self.entries[key]
+
+    def clear(self):
+        '''
+        forget every entry, but not the counts
+        '''
+        with self.lock:
+            self.entries.clear()
+
+    def statistics(self):
+        '''
+        the counts as a dictionary
+        '''
+        with self.lock:
+            return {
+                'entries'     : len(self.entries),
+                'hits'        : self.hits,
+                'misses'      : self.misses,
+                'evictions'   : self.evictions,
+                'expirations' : self.expirations,
+            }
+
+'''
+The caches wired up by memoise, by qualified method name
+'''
+caches = collections.OrderedDict()
+
+def memoise(cls,name,size=128,ttl=None):
+    '''
+    replace the named method of the add-in class with one that caches its results
+
+    The cache is shared by every instance of the class.
+    '''
+    function = getattr(cls,name)
+    cache = LRUCache(size,ttl)
+
+    def cached(self,*args):
+        try:
+            value, found = cache.get(args)
+        except TypeError:
+            return function(self,*args)
+        if not found:
+            value = function(self,*args)
+            cache.put(args,value)
+        return value
+
+    cached.__name__ = function.__name__
+    cached.__doc__  = function.__doc__
+    cached.cache    = cache
+    setattr(cls,name,cached)
+    caches[cls.__module__ + '.' + cls.__qualname__ + '.' + name] = cache
+    return cached
+
+def statistics():
+    '''
+    the counts of every cache wired up, as a list of (name, counts) pairs
+    '''
+    return [(name, cache.statistics()) for name, cache in caches.items()]
+
+# EOF
@@ -0,0 +1,176 @@
+'''
+Calc Add-In Ranges for Python 3.x.x
+
+Calc passes a range to an add-in function as a tuple of rows, each a tuple
+of cells, and takes one back as the result of an array formula.  Converting
+a large range cell by cell in Python, and building the result likewise, can
+take longer than the function itself.  This module converts ranges to and
+from compact arrays of doubles in bulk, with struct and zip rather than
+Python loops, wherever it can:
+
+    toArray(cells)          - a Range, an array('d') of the cells row by row
+                              with the attributes rows and columns
+    toNumpy(cells)          - a two dimensional NumPy array of doubles that
+                              shares the memory of such a Range
+    fromArray(values)       - the tuple of tuples of a Range or of an
+                              array('d'), given the number of columns
+    fromNumpy(values)       - the tuple of tuples of a NumPy array
+
+Empty cells, which calc passes as None, and strings do not fit an array of
+doubles.  What becomes of them is given by the empty and text options:
+    nan      - they become not a number (the default)
+    <number> - they become that number, such as 0
+    error    - the conversion raises ValueError
+    parse    - for text only, strings that read as numbers become those
+               numbers and others not a number
+
+This module is also the runtime behind the range: directive of capp.py.  A
+method opts in with a line in its multi-line description of the form:
+
+    range: [<parameter>...] [as=array|numpy] [empty=<option>] [text=<option>]
+
+Each parameter named, or else every parameter whose idl: type is a sequence
+of sequences, is converted with toArray or toNumpy before the method is
+called.  Should the method return a Range or a NumPy array, it is converted
+back to a tuple of tuples for calc.  The packaged component wires the
+conversions up by calling convert on the add-in class and this module is
+packaged in the pythonpath directory of the oxt.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import array, itertools, struct
+
+nan = float('nan')
+
+class Range(array.array):
+    '''
+    an array('d') of the cells of a range, row by row, and its shape:  rows and columns
+    '''
+    rows    = 0
+    columns = 0
+
+def cellValue(value,option,what):
+    '''
+    the double an empty cell or string becomes, as the option says
+    '''
+    if option == 'nan':
+        return nan
+    if option == 'error':
+        raise ValueError('I need numbers - the range has %s' % what)
+    if option == 'parse':
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return nan
+    return float(option)
+
+def converter(empty,text):
+    '''
+    the function that converts a cell that is not a number to a double
+    '''
+    emptyValue = None if empty in ('error', 'parse') else cellValue(None,empty,'empty cells')
+    textValue  = None if text in ('error', 'parse') else cellValue(None,text,'text')
+
+    def convert(value):
+        if value is None:
+            return cellValue(None,empty,'empty cells') if emptyValue is None else emptyValue
+        if isinstance(value,(float,int)):
+            return value
+        if isinstance(value,str):
+            return cellValue(value,text,'text') if textValue is None else textValue
+        raise ValueError('I need numbers - the range has a %s' % type(value).__name__)
+
+    return convert
+
+def toArray(cells,empty='nan',text='nan'):
+    '''
+    the cells of a range, a tuple of tuples, as a Range
+
+    The cells are packed as doubles in one call.  Only if there are empty cells
+    or strings are the cells converted one by one, as the empty and text options say.
+    '''
+    values = Range('d')
+    values.rows    = len(cells)
+    values.columns = len(cells[0]) if cells else 0
+
+    flat = list(itertools.chain.from_iterable(cells))
+    if len(flat) != values.rows * values.columns:
+        raise ValueError('I need a rectangular range - its rows are not all the same length')
+
+    format = '%dd' % len(flat)
+    try:
+        data = struct.pack(format,*flat)
+    except struct.error:
+        convert = converter(empty,text)
+        data = struct.pack(format,*[value if value.__class__ is float else convert(value) for value in flat])
+    values.frombytes(data)
+    return values
+
+def toNumpy(cells,empty='nan',text='nan'):
+    '''
+    the cells of a range, a tuple of tuples, as a two dimensional NumPy array of doubles
+    '''
+    import numpy
+
+    values = toArray(cells,empty,text)
+    return numpy.frombuffer(values,dtype=numpy.float64).reshape(values.rows,values.columns)
+
+def fromArray(values,columns=None):
+    '''
+    the tuple of tuples, fit to be returned to calc, of a Range or of an array('d') of the given columns
+    '''
+    if columns is None:
+        columns = values.columns
+    if not columns:
+        return ()
+    cells = iter(values.tolist())
+    return tuple(zip(*[cells] * columns))
+
+def fromNumpy(values):
+    '''
+    the tuple of tuples, fit to be returned to calc, of a NumPy array of one or two dimensions
+
+    An array of one dimension is returned as one row.
+    '''
+    if values.ndim < 2:
+        values = values.reshape(1,-1)
+    if not values.shape[1]:
+        return ()
+    cells = iter(values.ravel().tolist())
+    return tuple(zip(*[cells] * values.shape[1]))
+
+def fromRange(values):
+    '''
+    the tuple of tuples of a Range or NumPy array, or the value as it is if it is neither
+    '''
+    if isinstance(values,Range):
+        return fromArray(values)
+    if type(values).__module__ == 'numpy' and hasattr(values,'ndim'):
+        return fromNumpy(values)
+    return values
+
+def convert(cls,name,positions,kind='array',empty='nan',text='nan'):
+    '''
+    replace the named method of the add-in class with one that converts its range arguments
+
+    The arguments at the given positions are converted with toArray or, if kind
+    is numpy, toNumpy.  A Range or NumPy array returned is converted back.
+    '''
+    function = getattr(cls,name)
+    toValues = toNumpy if kind == 'numpy' else toArray
+    positions = frozenset(positions)
+
+    def converted(self,*args):
+        args = [toValues(arg,empty,text) if index in positions and isinstance(arg,tuple) else arg for index, arg in enumerate(args)]
+        return fromRange(function(self,*args))
+
+    converted.__name__ = function.__name__
+    converted.__doc__  = function.__doc__
+    setattr(cls,name,converted)
+    return converted
+
+# EOF
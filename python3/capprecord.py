@@ -0,0 +1,397 @@
+'''
+Calc Add-In Call Recorder for Python 3.x.x
+
+This module is the runtime behind the --record option of capp.py.  It records
+each call calc makes to an add-in function:  the function, its arguments,
+with their types, its result, or the exception it raised, when it was called
+and how long it took.  The calls recorded from real workbooks may then be
+replayed against the add-in outside LibreOffice (see bench/addinreplay.py)
+to tune its functions, or to check that changes to them do not change their
+results.
+
+Recording is turned on by setting, in the environment of soffice:
+    CAPP_RECORD      - the pathname of the log, in which %p stands for the process id
+    CAPP_RECORD_SIZE - the size of the log in MiB (default: 16)
+Otherwise the add-in functions are left as they are, so an add-in packaged
+with --record costs nothing until its calls are recorded.
+
+The log is a file of fixed size, mapped into memory, in which calls are
+recorded in turn, the oldest being overwritten once it is full, so it may be
+left recording for as long as need be.  It has a header:
+    magic    - CAPPREC1
+    version  - 1, the rest of the header as little-endian 32-bit integers:
+    header   - the size of the header, 64 bytes
+    capacity - the size of the ring of records that follows, as are the rest
+               as 64-bit integers:
+    head     - the number of bytes ever written to the ring
+    tail     - the number of bytes ever written to the ring before the oldest record
+    dropped  - the number of calls too large, or too odd, to be recorded
+Each record, at the offset head or tail modulo capacity, possibly wrapping
+round, has a 32-bit length, the time of the call and its duration in seconds
+as doubles, a status byte, 0 if the call returned and 1 if it raised, and then
+three values:  the function name, the tuple of arguments and the result, or
+the type and message of the exception.  A value is a tag and its content:
+    N - None, T - True and F - False, with no content
+    q - an integer, as a 64-bit integer
+    d - a float, as a double
+    s - a string, as a 32-bit length and UTF-8
+    t - a tuple or list, as a 32-bit count and the values it holds
+    o - anything else, as the string of its repr, which cannot be replayed
+
+This Python script also summarises a log:
+
+    capprecord.py [--calls] <log>
+
+writes a table with a row for each function and the columns:
+    function - the name of the add-in function
+    calls    - the number of calls recorded
+    raised   - the number of those that raised an exception
+    total ms - the time taken by all of them, in milliseconds
+    mean us  - the time taken by one on average, in microseconds
+or, given --calls, a line for each call recorded, oldest first.
+
+The packaged component wires the recorder up by calling record on the add-in
+class and this module is packaged in the pythonpath directory of the oxt.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, mmap, struct, threading, time
+
+'''
+The layout of the log
+'''
+magic   = b'CAPPREC1'
+version = 1
+_header = struct.Struct('<8sIIQQQQ')
+_record = struct.Struct('<IddB')
+_count  = struct.Struct('<I')
+_int    = struct.Struct('<q')
+_double = struct.Struct('<d')
+headerSize = 64
+
+'''
+Encoding and decoding values
+'''
+class Opaque(object):
+    '''
+    a value that was recorded only by its repr and so cannot be replayed
+    '''
+    def __init__(self,text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+def encode(value,output):
+    '''
+    append the encoding of the value to the output bytearray
+    '''
+    if value is None:
+        output += b'N'
+    elif value is True:
+        output += b'T'
+    elif value is False:
+        output += b'F'
+    elif isinstance(value,float):
+        output += b'd'
+        output += _double.pack(value)
+    elif isinstance(value,int) and -0x8000000000000000 <= value < 0x8000000000000000:
+        output += b'q'
+        output += _int.pack(value)
+    elif isinstance(value,str):
+        data = value.encode('utf-8','surrogatepass')
+        output += b's'
+        output += _count.pack(len(data))
+        output += data
+    elif isinstance(value,(tuple,list)):
+        output += b't'
+        output += _count.pack(len(value))
+        for item in value:
+            encode(item,output)
+    else:
+        data = repr(value).encode('utf-8','replace')
+        output += b'o'
+        output += _count.pack(len(data))
+        output += data
+    return output
+
+def decode(data,offset=0):
+    '''
+    the value encoded at the offset in the data and the offset of what follows
+    '''
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'T':
+        return True, offset
+    if tag == b'F':
+        return False, offset
+    if tag == b'd':
+        return _double.unpack_from(data,offset)[0], offset + _double.size
+    if tag == b'q':
+        return _int.unpack_from(data,offset)[0], offset + _int.size
+    if tag in (b's', b'o'):
+        length = _count.unpack_from(data,offset)[0]
+        offset += _count.size
+        text = bytes(data[offset:offset + length]).decode('utf-8','surrogatepass')
+        return (text if tag == b's' else Opaque(text)), offset + length
+    if tag == b't':
+        count = _count.unpack_from(data,offset)[0]
+        offset += _count.size
+        items = []
+        for index in range(count):
+            item, offset = decode(data,offset)
+            items.append(item)
+        return tuple(items), offset
+    raise ValueError('the log has an unknown tag %r' % tag)
+
+def replayable(data):
+    '''
+    whether the encoded values hold nothing recorded only by its repr
+    '''
+    try:
+        value = decode(data)[0]
+    except ValueError:
+        return False
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value,Opaque):
+            return False
+        if isinstance(value,tuple):
+            stack.extend(value)
+    return True
+
+'''
+Recording calls
+'''
+class Recorder(object):
+    '''
+    the log of calls, a ring of records in a file mapped into memory
+    '''
+    def __init__(self,path,capacity):
+        self.lock = threading.Lock()
+        size = headerSize + capacity
+
+        fd = os.open(path,os.O_RDWR | os.O_CREAT,0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd,0)
+                os.ftruncate(fd,size)
+            self.map = mmap.mmap(fd,size)
+        finally:
+            os.close(fd)
+
+        found, foundVersion, foundHeader, foundCapacity, head, tail, dropped = _header.unpack_from(self.map,0)
+        if (found, foundVersion, foundHeader, foundCapacity) != (magic, version, headerSize, capacity):
+            head = tail = dropped = 0
+        self.capacity = capacity
+        self.head     = head
+        self.tail     = tail
+        self.dropped  = dropped
+        self.writeHeader()
+
+    def writeHeader(self):
+        _header.pack_into(self.map,0,magic,version,headerSize,self.capacity,self.head,self.tail,self.dropped)
+
+    def put(self,position,data):
+        '''
+        write the data into the ring at the position, wrapping round if need be
+        '''
+        offset = position % self.capacity
+        first  = min(len(data),self.capacity - offset)
+        self.map[headerSize + offset:headerSize + offset + first] = data[:first]
+        if first < len(data):
+            self.map[headerSize:headerSize + len(data) - first] = data[first:]
+
+    def get(self,position,length):
+        '''
+        read data from the ring at the position, wrapping round if need be
+        '''
+        offset = position % self.capacity
+        first  = min(length,self.capacity - offset)
+        data = self.map[headerSize + offset:headerSize + offset + first]
+        if first < length:
+            data += self.map[headerSize:headerSize + length - first]
+        return data
+
+    def add(self,name,start,duration,raised,args,result):
+        '''
+        record one call, overwriting the oldest records to make room for it
+        '''
+        try:
+            record = bytearray(_record.size)
+            encode(name,record)
+            encode(args,record)
+            encode(result,record)
+            _record.pack_into(record,0,len(record),start,duration,raised)
+        except Exception:
+            record = None
+
+        with self.lock:
+            if record is None or len(record) > self.capacity // 4:
+                self.dropped += 1
+            else:
+                while self.head + len(record) - self.tail > self.capacity:
+                    self.tail += _count.unpack(self.get(self.tail,_count.size))[0]
+                self.put(self.head,record)
+                self.head += len(record)
+            self.writeHeader()
+
+def recorded(function,recorder):
+    '''
+    wrap the function so each call is recorded
+    '''
+    name = function.__name__
+
+    def wrapper(self,*args):
+        start = time.time()
+        begin = time.perf_counter()
+        try:
+            result = function(self,*args)
+        except Exception as error:
+            recorder.add(name,start,time.perf_counter() - begin,1,args,type(error).__name__ + ': ' + str(error))
+            raise
+        recorder.add(name,start,time.perf_counter() - begin,0,args,result)
+        return result
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__  = function.__doc__
+    return wrapper
+
+def startRecording(environ=os.environ):
+    '''
+    the recorder the environment asks for, if it asks for one
+    '''
+    path = environ.get('CAPP_RECORD')
+    if not path:
+        return None
+    path = path.replace('%p',str(os.getpid()))
+    try:
+        return Recorder(path,int(float(environ.get('CAPP_RECORD_SIZE') or 16) * 1024 * 1024))
+    except (OSError, ValueError) as error:
+        sys.stderr.write('capprecord: cannot record calls in ' + path + ' - ' + str(error) + '\n')
+        return None
+
+'''
+The recorder, started when this module is first imported, or None if calls are not recorded
+'''
+recorder = startRecording()
+
+def record(cls,names):
+    '''
+    replace the named methods of the add-in class with ones that record their calls
+
+    Should calls not be recorded, the methods are left as they are.
+    '''
+    if recorder is None:
+        return
+    for name in names:
+        setattr(cls,name,recorded(getattr(cls,name),recorder))
+
+'''
+Reading the log
+'''
+class Call(object):
+    '''
+    one call recorded:  the function, arguments and result are decoded when asked for
+
+    The result is that of the call or, if it raised an exception, a string of
+    the exception's type and message.  The encoded arguments and result are
+    kept as they were recorded, to compare with those of a replay.
+    '''
+    def __init__(self,name,start,duration,raised,args,result):
+        self.name     = name
+        self.start    = start
+        self.duration = duration
+        self.raised   = raised
+        self.args     = args
+        self.result   = result
+
+    def arguments(self):
+        return decode(self.args)[0]
+
+    def value(self):
+        return decode(self.result)[0]
+
+def readLog(path):
+    '''
+    the calls recorded in the log, oldest first, and the number of calls dropped
+    '''
+    with open(path,"rb") as input:
+        data = input.read()
+    if len(data) < headerSize:
+        raise ValueError('the log is too short to be one')
+
+    found, foundVersion, foundHeader, capacity, head, tail, dropped = _header.unpack_from(data,0)
+    if found != magic or foundVersion != version or len(data) != foundHeader + capacity:
+        raise ValueError('the log is not one capprecord.py wrote')
+
+    ring = data[foundHeader:]
+    ring += ring
+
+    calls = []
+    position = tail
+    while position < head:
+        offset = position % capacity
+        length, start, duration, raised = _record.unpack_from(ring,offset)
+        name, nameEnd = decode(ring,offset + _record.size)
+        argsEnd = decode(ring,nameEnd)[1]
+        calls.append(Call(name,start,duration,raised,ring[nameEnd:argsEnd],ring[argsEnd:offset + length]))
+        position += length
+    return calls, dropped
+
+def summary(calls):
+    '''
+    the summary of the calls of a log as a list of lines
+    '''
+    functions = {}
+    for call in calls:
+        counts = functions.setdefault(call.name,[0,0,0.0])
+        counts[0] += 1
+        counts[1] += call.raised
+        counts[2] += call.duration
+
+    lines = ['%-24s %8s %8s %10s %10s' % ('function', 'calls', 'raised', 'total ms', 'mean us')]
+    for name, (count, raised, total) in sorted(functions.items(),key=lambda item: (-item[1][2], item[0])):
+        lines.append('%-24s %8d %8d %10.3f %10.1f' % (name, count, raised, total * 1000.0, total * 1000000.0 / count))
+    return lines
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    arguments = argv[1:]
+    listCalls = '--calls' in arguments
+    if listCalls:
+        arguments.remove('--calls')
+
+    if len(arguments) != 1:
+        print ("I need a log to summarise - my one argument is its pathname")
+        return 1
+
+    try:
+        calls, dropped = readLog(arguments[0])
+    except (IOError, ValueError, struct.error) as error:
+        print ("I cannot read the log - " + str(error))
+        return 1
+
+    if listCalls:
+        for call in calls:
+            line = '%s %10.1fus %s%r' % (time.strftime('%Y-%m-%d %H:%M:%S',time.localtime(call.start)), call.duration * 1000000.0, call.name, call.arguments())
+            print (line if len(line) <= 160 else line[:157] + '...')
+    else:
+        for line in summary(calls):
+            print (line)
+    print ('%d calls recorded, %d dropped' % (len(calls), dropped))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
@@ -0,0 +1,358 @@
+'''
+Calc Add-In Preprocessor Server for Python 3.x.x
+
+Each run of capp.py pays for starting Python, which for the Python shipped
+with LibreOffice is slow.  A capp server is started once, with:
+
+    capp.py serve [--socket path] [--sdk directory]
+
+and then answers requests, several at once, over a Unix domain socket.
+Given --sdk, it builds type libraries, when asked to, with the idlc and
+regmerge of the LibreOffice installed in the directory.
+
+This Python script is also the client.  It takes the same arguments as
+capp.py, bar serve and watch, preceded by an optional --socket option:
+
+    cappserve.py [--socket path] generate moduleName sourceFile [sourceFile ...] [options]
+
+and writes the same output, bar the trace:  given the --trace option, only the
+request as a whole is traced.  It need not be run by LibreOffice's Python:
+any Python 3, started with -S, is quicker.  Pathnames are resolved by the
+client, as is SOURCE_DATE_EPOCH, so the server may have been started in
+any directory.  The exit status is 2 if there is no server, in which case
+nothing is written and capp.py should be run instead.  So it is too given
+the --types option:  the server runs no commands it is given, so only
+capp.py runs those.  The --sdk option is passed on as a flag and the server
+builds the type library with the SDK it was started with.
+
+The socket is given by the --socket option, else by the CAPP_SOCKET
+environment variable, else it is capp.sock in the user's runtime directory,
+XDG_RUNTIME_DIR, else in /tmp/capp-<uid>, a directory the server creates
+that only the user may use.  The socket may be used only by the user who
+started the server, and the client uses no socket anyone else owns.
+
+Requests and responses are single lines of json.  A request has a target,
+a module name and the pathname of a source file plus, optionally, any of
+the capp.py options by name:  output, rdb, timestamp, compression, order,
+engine, sdk, stats, record, lazy, bytecode and bundle, and the pathnames of further sources.  A response has a status, ok or error, plus:
+    output  - for idl, xcu, xml, manifest and json, what was generated, and for build, its log
+    files   - for all, the files generated, by name
+    message - for error, what went wrong
+Models are cached by source file, so a source that has not changed is
+not parsed again.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, getopt, json, socket, stat, threading
+
+def privateDirectory():
+    '''
+    the directory in /tmp, only the user's, of the server's socket when there is no runtime directory
+    '''
+    return '/tmp/capp-%d' % os.getuid()
+
+def defaultSocket():
+    '''
+    the pathname of the server's socket unless one is given explicitly
+    '''
+    return os.environ.get('CAPP_SOCKET') or os.path.join(os.environ.get('XDG_RUNTIME_DIR') or privateDirectory(),'capp.sock')
+
+def owned(path):
+    '''
+    whether the path is a socket the user owns
+    '''
+    try:
+        status = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(status.st_mode) and status.st_uid == os.getuid()
+
+class ModelCache(object):
+    '''
+    AddIn models, or lists of them, by source file, kept for as long as the source is unchanged
+    '''
+    def __init__(self,capp):
+        self.capp   = capp
+        self.lock   = threading.Lock()
+        self.models = {}
+
+    def get(self,sourcePath,moduleName,engine):
+        '''
+        the model of the add-in, parsed again only if the source has changed
+        '''
+        status = os.stat(sourcePath)
+        key = (sourcePath, moduleName, engine)
+        stamp = (status.st_mtime, status.st_size)
+
+        with self.lock:
+            cached = self.models.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        addIn = self.capp.processFile(sourcePath,moduleName,engine)
+        with self.lock:
+            self.models[key] = (stamp, addIn)
+        return addIn
+
+def handle(capp,cache,request,sdk=None):
+    '''
+    carry out one request, returning the response
+
+    Type libraries are built, if the request asks for sdk, with the idlc and
+    regmerge of the LibreOffice installed in the sdk directory.  Commands are
+    never taken from the request.
+    '''
+    target = request.get('target')
+    engine = request.get('engine','regex')
+
+    if not target in list(capp.generators) + ['rdb', 'all', 'oxt', 'build']:
+        return {'status': 'error', 'message': 'I cannot generate "%s" for you' % target}
+
+    if not engine in capp.engines:
+        return {'status': 'error', 'message': 'I do not know the engine "%s"' % engine}
+
+    if 'types' in request:
+        return {'status': 'error', 'message': 'I do not run commands I am given - ask for sdk instead of types'}
+
+    if request.get('sdk') and not sdk:
+        return {'status': 'error', 'message': 'I cannot build with the SDK - the server was started without --sdk'}
+
+    if request.get('sources') and not request.get('bundle'):
+        return {'status': 'error', 'message': 'I need to know what to do with more than one source file - package them together with bundle'}
+
+    try:
+        sourcePaths = [request['source']] + request.get('sources',[])
+        if request.get('bundle'):
+            addIns = []
+            for sourcePath in sourcePaths:
+                addIns.extend(cache.get(sourcePath,None,engine))
+            model = capp.Package(request['module'],addIns) if addIns else None
+        else:
+            model = cache.get(request['source'],request['module'],engine)
+    except (KeyError, OSError, IOError):
+        return {'status': 'error', 'message': "I need a python module to process - the module name and the path to the module's implementation"}
+
+    if model is None:
+        if target in ('all', 'oxt', 'rdb', 'build'):
+            return {'status': 'error', 'message': 'I cannot find the add-in %s in %s' % (request['module'], ', '.join(sourcePaths))}
+        return {'status': 'ok', 'output': ''}
+
+    if request.get('stats'):
+        model = capp.withStatistics(model)
+    if request.get('record'):
+        model = capp.withRecording(model)
+
+    if target == 'all':
+        if request.get('output'):
+            capp.writePackageFiles(model,request['output'])
+        files = capp.packageFiles(model)
+        return {'status': 'ok', 'files': dict((name, content.decode('utf-8')) for name, content in files.items())}
+
+    if target == 'oxt':
+        import oxt
+        if not (request.get('output') and request.get('rdb')):
+            return {'status': 'error', 'message': 'I need to know what to package and where - oxt requires output and rdb'}
+        try:
+            sources = dict((os.path.basename(path), capp.readBytes(path)) for path in sourcePaths)
+            members = capp.oxtMembers(model,sources,capp.readBytes(request['rdb']),request.get('lazy',False),request.get('bytecode',False))
+        except IOError:
+            return {'status': 'error', 'message': 'I need a type library to package - rdb must name one built from the IDL'}
+        oxt.writeOxt(request['output'],members,request.get('timestamp'),request.get('order'),request.get('compression',9))
+        return {'status': 'ok'}
+
+    if target == 'rdb':
+        if not request.get('output'):
+            return {'status': 'error', 'message': 'I need to know where to put the type library - rdb requires output'}
+        try:
+            data = capp.rdbGenerate(model)
+        except ValueError as error:
+            return {'status': 'error', 'message': str(error)}
+        with open(request['output'],"wb") as output:
+            output.write(data)
+        return {'status': 'ok'}
+
+    if target == 'build':
+        if not (request.get('output') and request.get('rdb')):
+            return {'status': 'error', 'message': 'I need to know what to build - build requires output and rdb'}
+        lines = []
+        sources = dict((os.path.basename(path), capp.readBytes(path)) for path in sourcePaths)
+        types = None
+        if request.get('sdk'):
+            types = capp.sdkCommands(sdk,capp.asPackage(model).typesName + '.idl',os.path.basename(request['rdb']))
+        try:
+            capp.build(model,sources,request['output'],request['rdb'],types,request.get('timestamp'),request.get('order'),request.get('compression',9),request.get('lazy',False),request.get('bytecode',False),lines.append)
+        except capp.PipelineError as error:
+            return {'status': 'error', 'message': '\n'.join(lines + ['I failed to build the package - ' + str(error)])}
+        return {'status': 'ok', 'output': ''.join(line + '\n' for line in lines)}
+
+    return {'status': 'ok', 'output': capp.generate(model,target)}
+
+def serve(capp,socketPath,sdk=None):
+    '''
+    answer requests on the socket, using the capp module given, until interrupted
+
+    The socket is created so that only the user may use it.  A socket left by
+    a server before is replaced, but not one anyone else owns nor anything
+    else.  The exit status is returned.
+    '''
+    import socketserver
+
+    directory = os.path.dirname(os.path.abspath(socketPath))
+    if directory == privateDirectory():
+        try:
+            os.mkdir(directory,0o700)
+        except OSError:
+            pass
+        status = os.lstat(directory)
+        if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or status.st_mode & 0o077:
+            print ("I cannot serve on " + socketPath + " - " + directory + " is not a directory only you may use")
+            return 1
+
+    if os.path.lexists(socketPath):
+        if not owned(socketPath):
+            print ("I cannot serve on " + socketPath + " - it is not a socket of yours")
+            return 1
+        os.unlink(socketPath)
+
+    cache = ModelCache(capp)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    response = handle(capp,cache,json.loads(line.decode('utf-8')),sdk)
+                except Exception as error:
+                    response = {'status': 'error', 'message': 'I failed - ' + str(error)}
+                self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socketPath):
+        os.unlink(socketPath)
+
+    mask = os.umask(0o177)
+    try:
+        server = Server(socketPath,Handler)
+    finally:
+        os.umask(mask)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socketPath)
+    return 0
+
+def request(socketPath,message):
+    '''
+    send one request to the server and return its response, or None if there is no server
+
+    A socket someone else owns is taken to be no server.
+    '''
+    if not owned(socketPath):
+        return None
+
+    connection = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+    try:
+        connection.connect(socketPath)
+    except socket.error:
+        return None
+
+    try:
+        connection.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        response = connection.makefile('rb').readline()
+    finally:
+        connection.close()
+
+    return json.loads(response.decode('utf-8'))
+
+def main(argv):
+    '''
+    the client's command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    socketPath = defaultSocket()
+    if len(argv) > 2 and argv[1] == '--socket':
+        socketPath = argv[2]
+        argv = argv[:1] + argv[3:]
+    elif len(argv) > 1 and argv[1].startswith('--socket='):
+        socketPath = argv[1][len('--socket='):]
+        argv = argv[:1] + argv[2:]
+
+    if len(argv) < 4:
+        print ("I need to know what to generate from what - my arguments are those of capp.py")
+        return 1
+
+    try:
+        options, arguments = getopt.gnu_getopt(argv[4:], 'o:', ['rdb=', 'timestamp=', 'compression=', 'order=', 'engine=', 'types=', 'sdk=', 'trace=', 'stats', 'record', 'lazy', 'bytecode', 'bundle'])
+    except getopt.GetoptError as error:
+        print ("I do not understand my options - " + str(error))
+        return 1
+
+    trace = None
+    message = {'target': argv[1], 'module': argv[2], 'source': os.path.abspath(argv[3])}
+    if arguments:
+        message['sources'] = [os.path.abspath(path) for path in arguments]
+    for option, value in options:
+        if option == '-o':
+            message['output'] = os.path.abspath(value)
+        elif option == '--rdb':
+            message['rdb'] = os.path.abspath(value)
+        elif option == '--timestamp':
+            message['timestamp'] = int(value)
+        elif option == '--compression':
+            message['compression'] = int(value)
+        elif option == '--order':
+            message['order'] = value.split(',')
+        elif option == '--engine':
+            message['engine'] = value
+        elif option == '--types':
+            return 2
+        elif option == '--sdk':
+            message['sdk'] = True
+        elif option == '--stats':
+            message['stats'] = True
+        elif option == '--record':
+            message['record'] = True
+        elif option == '--lazy':
+            message['lazy'] = True
+        elif option == '--bytecode':
+            message['bytecode'] = True
+        elif option == '--bundle':
+            message['bundle'] = True
+        elif option == '--trace':
+            trace = value
+
+    if not 'timestamp' in message and os.environ.get('SOURCE_DATE_EPOCH'):
+        message['timestamp'] = int(os.environ['SOURCE_DATE_EPOCH'])
+
+    if trace:
+        import capptrace
+        tracer = capptrace.Tracer(trace,'cappserve.py ' + argv[1])
+        with tracer.span('request'):
+            response = request(socketPath,message)
+        if response is not None:
+            tracer.write()
+    else:
+        response = request(socketPath,message)
+
+    if response is None:
+        return 2
+
+    if response['status'] != 'ok':
+        print (response['message'])
+        return 1
+
+    sys.stdout.write(response.get('output',''))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
@@ -0,0 +1,131 @@
+'''
+Calc Add-In Statistics for Python 3.x.x
+
+This module is the runtime behind the --stats option of capp.py.  It counts
+the calls to each add-in function, the time they take altogether and how
+long each takes, as a histogram, so that those functions that dominate
+recalculation may be found without a debugger.
+
+An add-in packaged with --stats has one more function, named after its class
+with its first letter lower case, such as, for the class DoobieDoo:
+
+    doobieDooStats()
+
+entered in calc as an array formula, which returns a table with a row for
+each of the add-in's own functions and the columns:
+    function  - the name of the add-in function
+    calls     - the number of calls
+    total (s) - the time taken by all the calls, in seconds
+    mean (s)  - the time taken by one call on average, in seconds
+    < 10us ... >= 1s - the number of calls taking that long
+    cache hits, cache misses - for functions whose results are cached
+
+The packaged component wires the statistics up by calling instrument on the
+add-in class and this module is packaged in the pythonpath directory of the oxt.
+The statistics are kept by class, so the add-ins of one package, or of other
+packages, each report only their own functions, whatever they are named, and
+calc, which knows add-in functions by name, can tell their reports apart.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, collections, threading, time
+
+'''
+The upper bounds, in seconds, of all but the last bucket of the latency histogram
+'''
+bounds = [0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0]
+labels = ['< 10us', '< 100us', '< 1ms', '< 10ms', '< 100ms', '< 1s', '>= 1s']
+
+class Counter(object):
+    '''
+    the calls to one add-in function, the time they took and a histogram of that time
+    '''
+    def __init__(self,name):
+        self.name      = name
+        self.lock      = threading.Lock()
+        self.calls     = 0
+        self.total     = 0.0
+        self.histogram = [0] * (len(bounds) + 1)
+
+    def record(self,elapsed):
+        '''
+        count one call that took the given number of seconds
+        '''
+        bucket = 0
+        while bucket < len(bounds) and elapsed >= bounds[bucket]:
+            bucket += 1
+        with self.lock:
+            self.calls += 1
+            self.total += elapsed
+            self.histogram[bucket] += 1
+
+'''
+The counters wired up by instrument, in the order they were, by qualified class name
+'''
+counters = collections.OrderedDict()
+
+def className(cls):
+    '''
+    the qualified name of the add-in class:  its module and name
+    '''
+    return cls.__module__ + '.' + cls.__qualname__
+
+def timed(function,counter):
+    '''
+    wrap the function so each call is counted and timed
+    '''
+    def wrapper(self,*args):
+        start = time.perf_counter()
+        try:
+            return function(self,*args)
+        finally:
+            counter.record(time.perf_counter() - start)
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__  = function.__doc__
+    wrapper.counter  = counter
+    return wrapper
+
+def instrument(cls,names,function):
+    '''
+    replace the named methods of the add-in class with ones that count calls and time them
+
+    The class gains a method, by the name of function, which returns the
+    statistics of its functions as a table.
+    '''
+    key = className(cls)
+    classCounters = counters.setdefault(key,[])
+    for name in names:
+        counter = Counter(name)
+        setattr(cls,name,timed(getattr(cls,name),counter))
+        classCounters.append(counter)
+
+    setattr(cls,function,lambda self: table(key))
+
+def table(key):
+    '''
+    the statistics of the functions of the class with the qualified name, as
+        a tuple of rows, headings first, fit to be returned to calc
+    '''
+    cappcache = sys.modules.get('cappcache')
+    caches = cappcache.caches if cappcache else {}
+
+    rows = [tuple(['function', 'calls', 'total (s)', 'mean (s)'] + labels + ['cache hits', 'cache misses'])]
+    for counter in counters.get(key,[]):
+        with counter.lock:
+            row = [counter.name, counter.calls, counter.total, counter.total / counter.calls if counter.calls else 0.0]
+            row.extend(counter.histogram)
+        cache = caches.get(key + '.' + counter.name)
+        if cache:
+            counts = cache.statistics()
+            row.extend([counts['hits'], counts['misses']])
+        else:
+            row.extend(['', ''])
+        rows.append(tuple(row))
+    return tuple(rows)
+
+# EOF
@@ -0,0 +1,153 @@
+'''
+Calc Add-In Packaging Trace for Python 3.x.x
+
+When packaging is slow, this module shows where the time goes.  Given the
+--trace option, capp.py records when each of its steps starts and ends:
+parsing the source, rendering the package files, building the type library
+and writing the package.  liboaddon --trace=<file> records its own steps too,
+such as starting Python, idlc, regmerge and zip, in the same file.
+
+The trace is written in the JSON array form of the Chrome trace event format,
+so it may be loaded as it is into chrome://tracing or https://ui.perfetto.dev.
+Each step is a complete ('X') event with its start and duration in
+microseconds since the epoch.  The closing bracket of the array is left off,
+as the format allows, so that any number of processes may append to the one
+trace.
+
+This Python script also summarises a trace:
+
+    capptrace.py <trace>
+
+writes a table with a row for each step, the steps that took longest first,
+and the columns:
+    step      - the name of the step
+    calls     - the number of times it was taken
+    total ms  - the time taken by all of them, in milliseconds
+    mean ms   - the time taken by one on average, in milliseconds
+    % wall    - the total as a percentage of the time from first start to last end
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, json, threading, time
+
+def now():
+    '''
+    the time in microseconds since the epoch, the clock every process writing a trace shares
+    '''
+    return int(time.time() * 1000000)
+
+class Span(object):
+    '''
+    the context in which one step is taken, recorded as an event on leaving it
+    '''
+    def __init__(self,tracer,name,category):
+        self.tracer   = tracer
+        self.name     = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self,*exception):
+        self.tracer.add(self.name,self.category,self.start,now())
+        return False
+
+class Tracer(object):
+    '''
+    the events of one process, appended to the trace file when written
+    '''
+    def __init__(self,path,processName):
+        self.path   = path
+        self.lock   = threading.Lock()
+        self.events = [{'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': processName}}]
+
+    def span(self,name,category='capp'):
+        '''
+        the context in which the named step is taken
+        '''
+        return Span(self,name,category)
+
+    def add(self,name,category,start,end):
+        '''
+        record one step that started and ended at the given times, in microseconds
+        '''
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': end - start,
+                 'pid': os.getpid(), 'tid': threading.current_thread().ident}
+        with self.lock:
+            self.events.append(event)
+
+    def write(self):
+        '''
+        append the events recorded to the trace file, starting the array if it is new
+        '''
+        with self.lock:
+            events, self.events = self.events, []
+        lines = ''.join(json.dumps(event,sort_keys=True) + ',\n' for event in events)
+        with open(self.path,"a") as output:
+            if output.tell() == 0:
+                output.write('[\n')
+            output.write(lines)
+
+def readTrace(path):
+    '''
+    the events of a trace file, whether or not its array is closed
+    '''
+    with open(path) as input:
+        text = input.read().strip()
+    if text.startswith('[') and not text.endswith(']'):
+        text = text.rstrip(',') + ']'
+    events = json.loads(text) if text else []
+    if isinstance(events,dict):
+        events = events.get('traceEvents',[])
+    return events
+
+def summary(events):
+    '''
+    the summary of the steps of a trace as a list of lines
+    '''
+    steps = {}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        counts = steps.setdefault(event['name'],[0,0])
+        counts[0] += 1
+        counts[1] += event['dur']
+
+    complete = [event for event in events if event.get('ph') == 'X']
+    if not complete:
+        return ['the trace has no steps']
+    wall = max(event['ts'] + event['dur'] for event in complete) - min(event['ts'] for event in complete)
+
+    lines = ['%-16s %6s %10s %10s %7s' % ('step', 'calls', 'total ms', 'mean ms', '% wall')]
+    for name, (calls, total) in sorted(steps.items(),key=lambda item: (-item[1][1], item[0])):
+        lines.append('%-16s %6d %10.3f %10.3f %7.1f' % (name, calls, total / 1000.0, total / 1000.0 / calls, 100.0 * total / wall if wall else 0.0))
+    lines.append('%-16s %6s %10.3f' % ('wall', '', wall / 1000.0))
+    return lines
+
+def main(argv):
+    '''
+    the command line interface:  argv is as sys.argv and the exit status is returned
+    '''
+    if len(argv) != 2:
+        print ("I need a trace to summarise - my one argument is its pathname")
+        return 1
+
+    try:
+        events = readTrace(argv[1])
+    except (IOError, ValueError) as error:
+        print ("I cannot read the trace - " + str(error))
+        return 1
+
+    for line in summary(events):
+        print (line)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# EOF
@@ -10,7 +10,13 @@ publisherName = Doobie Company
 publisherLink = http://www.doobiecompany.com
 '''
 
+import time
 import uno, unohelper
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from com.doobiecompany.examples.DoobieDoo import XDoobieDoo
 
 unoComponentId = "com.doobiecompany.examples.DoobieDoo.python.DoobieDoo"
@@ -25,6 +31,7 @@ class DoobieDoo (unohelper.Base, XDoobieDoo):
             a - the first integer
             b - the second integer
         idl: long doobieMultv ([in] long a, [in] long b);
+        cache: size=1000
         """
         return a * b
 
@@ -59,6 +66,57 @@ class DoobieDoo (unohelper.Base, XDoobieDoo):
         else:
             return str(s1) + str(s2) + str(s3)
 
+    def doobieMultArray (self, a, b):
+        """
+        Multiplies two ranges of numbers cell by cell in a single call
+            a - the first range of numbers
+            b - the second range of numbers, the same shape as the first
+        idl: sequence< sequence< double > > doobieMultArray ([in] sequence< sequence< double > > a, [in] sequence< sequence< double > > b);
+        """
+        if numpy is not None:
+            return _rows((numpy.array(a) * numpy.array(b)).tolist())
+        return tuple(tuple(x * y for x, y in zip(ra, rb)) for ra, rb in zip(a, b))
+
+    def doobieDivArray (self, a, b):
+        """
+        Divides two ranges of numbers cell by cell, giving not a number where the divisor is zero
+            a - the range of numbers to be divided
+            b - the range of divisors, the same shape as the first
+        idl: sequence< sequence< double > > doobieDivArray ([in] sequence< sequence< double > > a, [in] sequence< sequence< double > > b);
+        """
+        if numpy is not None:
+            a, b = numpy.array(a), numpy.array(b)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                result = numpy.where(b != 0, a / b, numpy.nan)
+            return _rows(result.tolist())
+        return tuple(tuple(x / y if y else float('nan') for x, y in zip(ra, rb)) for ra, rb in zip(a, b))
+
+    def doobieConcatArray (self, s1, s2):
+        """
+        Concatenates two ranges of strings cell by cell, empty cells being empty strings
+            s1 - the first range of strings
+            s2 - the second range of strings, the same shape as the first
+        idl: sequence< sequence< any > > doobieConcatArray ([in] sequence< sequence< any > > s1, [in] sequence< sequence< any > > s2);
+        """
+        return tuple(tuple(_text(x) + _text(y) for x, y in zip(r1, r2)) for r1, r2 in zip(s1, s2))
+
+    def doobieLater (self, a, seconds):
+        """
+        Returns a number after a delay, leaving calc free in the meantime
+            a - the number to return
+            seconds - how long to take about it
+        idl: double doobieLater ([in] double a, [in] double seconds);
+        async: workers=4
+        """
+        time.sleep(seconds)
+        return a
+
+def _rows (values):
+    return tuple(tuple(row) for row in values)
+
+def _text (value):
+    return '' if value is None else str(value)
+
 def createInstance (ctx):
     return DoobieDoo (ctx)
 
@@ -0,0 +1,122 @@
+'''
+Oxt Package Writer for Python 3.x.x
+
+An oxt package is a zip archive.  This module writes one directly from
+contents held in memory, one member at a time, without staging the members
+on disk and without the zip command line tool.
+
+The archive is reproducible:  given the same members, the same order, the
+same timestamp and the same compression level, the bytes written are the same.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import os, struct, time, zlib
+
+'''
+Zip record signatures and fields common to every member
+'''
+_sigLocal    = 0x04034b50
+_sigCentral  = 0x02014b50
+_sigEnd      = 0x06054b50
+_versionMade = (3 << 8) | 20            # unix, zip 2.0
+_versionNeed = 20                       # zip 2.0, deflate
+_flagUtf8    = 0x0800
+_attrFile    = (0o100644 & 0xFFFF) << 16
+
+def dosDateTime(timestamp):
+    '''
+    convert seconds since the epoch to the MS-DOS date and time zip uses
+
+    MS-DOS time has a resolution of two seconds and starts in 1980.
+    '''
+    year, month, day, hour, minute, second = time.gmtime(max(timestamp, 315532800))[:6]
+    return ((year - 1980) << 9) | (month << 5) | day, (hour << 11) | (minute << 5) | (second // 2)
+
+def sourceDateEpoch():
+    '''
+    the timestamp given by the SOURCE_DATE_EPOCH convention, if any
+    '''
+    value = os.environ.get('SOURCE_DATE_EPOCH')
+    if value:
+        return int(value)
+    return None
+
+class OxtWriter(object):
+    '''
+    write a zip archive to a binary file object, member by member
+
+    Members are compressed with deflate at the given level, or stored if the
+    level is 0.  Every member carries the given timestamp, which defaults to
+    SOURCE_DATE_EPOCH if set or else the current time.
+    '''
+    def __init__(self,output,timestamp=None,compression=9):
+        if timestamp is None:
+            timestamp = sourceDateEpoch()
+        if timestamp is None:
+            timestamp = time.time()
+        self.output      = output
+        self.date, self.time = dosDateTime(timestamp)
+        self.compression = compression
+        self.offset      = 0
+        self.central     = []
+
+    def add(self,name,data):
+        '''
+        compress and write one member
+        '''
+        encodedName = name.encode('utf-8')
+        crc = zlib.crc32(data) & 0xFFFFFFFF
+
+        if self.compression:
+            compressor = zlib.compressobj(self.compression, zlib.DEFLATED, -zlib.MAX_WBITS)
+            packed = compressor.compress(data) + compressor.flush()
+            method = 8
+        else:
+            packed = data
+            method = 0
+
+        header = struct.pack('<IHHHHHIIIHH', _sigLocal, _versionNeed, _flagUtf8, method,
+                             self.time, self.date, crc, len(packed), len(data), len(encodedName), 0)
+        self.output.write(header)
+        self.output.write(encodedName)
+        self.output.write(packed)
+
+        self.central.append(struct.pack('<IHHHHHHIIIHHHHHII', _sigCentral, _versionMade, _versionNeed,
+                                        _flagUtf8, method, self.time, self.date, crc, len(packed), len(data),
+                                        len(encodedName), 0, 0, 0, 0, _attrFile, self.offset) + encodedName)
+        self.offset += len(header) + len(encodedName) + len(packed)
+
+    def close(self):
+        '''
+        write the central directory that ends the archive
+        '''
+        start = self.offset
+        for record in self.central:
+            self.output.write(record)
+            self.offset += len(record)
+
+        self.output.write(struct.pack('<IHHHHIIH', _sigEnd, 0, 0, len(self.central), len(self.central),
+                                      self.offset - start, start, 0))
+
+def orderMembers(names,order=None):
+    '''
+    the member names with those named in order first, in that order, and the rest sorted
+    '''
+    order = [name for name in (order or []) if name in names]
+    return order + sorted(name for name in names if name not in order)
+
+def writeOxt(path,members,timestamp=None,order=None,compression=9):
+    '''
+    write the members, a dictionary of names and contents, as an oxt package
+    '''
+    with open(path,"wb") as output:
+        writer = OxtWriter(output,timestamp,compression)
+        for name in orderMembers(members,order):
+            writer.add(name,members[name])
+        writer.close()
+
+# EOF
@@ -0,0 +1,190 @@
+'''
+Type Library Writer for Python 3.x.x
+
+A calc add-in's package carries a type library, an rdb file, declaring the
+add-in's interface.  The SDK builds one from the IDL with idlc and regmerge.
+This module writes one directly, in the binary UNOIDL format LibreOffice has
+read since 4.1, so packaging needs neither the SDK nor two more processes.
+
+The format is little endian.  The file starts with the 8 bytes 'UNOIDL\xFF\0'
+and the offset and number of entries of the root map.  A map is a sequence of
+entries, sorted by name, each the offset of a NUL terminated name and the
+offset of what it names.  A module is the kind byte 0 followed by the number
+of entries of its map and the entries themselves.  An interface is the kind
+byte 5 followed by its bases, attributes and methods.  Every string is written
+in place as its length, with the top bit set, followed by its UTF-8 bytes.
+
+Only what add-ins declare is written:  interfaces, within modules, whose
+methods take and return the simple types, any, sequences and named types.
+Every interface has the one base, com.sun.star.uno.XInterface, as IDL gives
+an interface declared without a base.
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import re, struct
+
+'''
+The header, the kinds of entity and the directions of parameters
+'''
+_magic         = b'UNOIDL\xFF\0'
+_kindModule    = 0
+_kindInterface = 5
+_directions    = {'in': 0, 'out': 1, 'inout': 2}
+_base          = 'com.sun.star.uno.XInterface'
+
+'''
+The types that are named as they are in IDL
+'''
+_simpleTypes = set(['void', 'boolean', 'byte', 'short', 'unsigned short', 'long', 'unsigned long',
+                    'hyper', 'unsigned hyper', 'float', 'double', 'char', 'string', 'type', 'any'])
+
+_reSequence  = re.compile(r'^sequence\s*<\s*(.*)\s*>$')
+_reNamed     = re.compile(r'^(?:::)?(\w+(?:::\w+)*)$')
+
+def typeName(idlType):
+    '''
+    the UNOIDL name of an IDL type:  sequence<double> is []double and
+        com::sun::star::table::XCellRange is com.sun.star.table.XCellRange
+
+    Named types must be qualified with their modules.
+    '''
+    idlType = ' '.join(idlType.split())
+    if idlType in _simpleTypes:
+        return idlType
+
+    result = _reSequence.match(idlType)
+    if result:
+        return '[]' + typeName(result.group(1))
+
+    result = _reNamed.match(idlType)
+    if result and '::' in result.group(1):
+        return result.group(1).replace('::','.')
+
+    raise ValueError('I do not know the type "%s" - named types must be qualified with their modules' % idlType)
+
+class Interface(object):
+    '''
+    an interface to be declared:  its qualified name and methods
+
+    Methods are (name, return type, parameters, exceptions) tuples where the
+    parameters are (direction, type, name) tuples and types are IDL types.
+    '''
+    def __init__(self,name,methods):
+        self.name    = name
+        self.methods = methods
+
+class RdbWriter(object):
+    '''
+    build a type library in memory, one entity after another
+    '''
+    def __init__(self):
+        self.data = bytearray(_magic + struct.pack('<II',0,0))
+
+    def offset(self):
+        return len(self.data)
+
+    def write8(self,value):
+        self.data += struct.pack('<B',value)
+
+    def write32(self,value):
+        self.data += struct.pack('<I',value)
+
+    def writeString(self,text):
+        '''
+        write a string in place:  its length, the top bit set, and its bytes
+        '''
+        encoded = text.encode('utf-8')
+        self.write32(0x80000000 | len(encoded))
+        self.data += encoded
+
+    def writeName(self,name):
+        '''
+        write a NUL terminated name for a map entry, returning its offset
+        '''
+        offset = self.offset()
+        self.data += name.encode('ascii') + b'\0'
+        return offset
+
+    def writeInterface(self,interface):
+        '''
+        write an interface, returning its offset
+        '''
+        offset = self.offset()
+        self.write8(_kindInterface)
+        self.write32(1)
+        self.writeString(_base)
+        self.write32(0)                         # optional bases
+        self.write32(0)                         # attributes
+        self.write32(len(interface.methods))
+        for name, returnType, parameters, exceptions in interface.methods:
+            self.writeString(name)
+            self.writeString(typeName(returnType))
+            self.write32(len(parameters))
+            for direction, parameterType, parameterName in parameters:
+                self.write8(_directions[direction])
+                self.writeString(parameterName)
+                self.writeString(typeName(parameterType))
+            self.write32(len(exceptions))
+            for exception in exceptions:
+                self.writeString(typeName(exception))
+        return offset
+
+    def writeMap(self,entities,root=False):
+        '''
+        write what the entities of a module name and then its map, returning the map's offset
+
+        Entities are a dictionary of names and either dictionaries, for modules,
+        or interfaces.  The root map has no kind byte nor count, these being in the header.
+        '''
+        names = sorted(entities)
+        offsets = {}
+        for name in names:
+            if isinstance(entities[name],dict):
+                offsets[name] = self.writeMap(entities[name])
+            else:
+                offsets[name] = self.writeInterface(entities[name])
+
+        nameOffsets = dict((name, self.writeName(name)) for name in names)
+
+        offset = self.offset()
+        if root:
+            struct.pack_into('<II',self.data,len(_magic),offset,len(names))
+        else:
+            self.write8(_kindModule)
+            self.write32(len(names))
+        for name in names:
+            self.write32(nameOffsets[name])
+            self.write32(offsets[name])
+        return offset
+
+def rdbBytes(interfaces):
+    '''
+    the type library declaring the interfaces, as bytes
+    '''
+    root = {}
+    for interface in interfaces:
+        modules = interface.name.split('.')
+        entities = root
+        for module in modules[:-1]:
+            entities = entities.setdefault(module,{})
+            if not isinstance(entities,dict):
+                raise ValueError('I cannot declare "%s" - "%s" is an interface, not a module' % (interface.name, module))
+        entities[modules[-1]] = interface
+
+    writer = RdbWriter()
+    writer.writeMap(root,True)
+    return bytes(writer.data)
+
+def writeRdb(path,interfaces):
+    '''
+    write the type library declaring the interfaces
+    '''
+    data = rdbBytes(interfaces)
+    with open(path,"wb") as output:
+        output.write(data)
+
+# EOF
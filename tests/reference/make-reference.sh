@@ -0,0 +1,47 @@
+#!/bin/bash --posix
+
+##
+##  Goal:   Build the reference type library of the DoobieDoo example with
+##          LibreOffice's own tools, for tests/test_rdb.py to compare with
+##          the type library capp.py writes
+##
+##  Use:    tests/reference/make-reference.sh [<libreoffice>]
+##
+##  where   <libreoffice> is where LibreOffice, with its SDK, is installed
+##            (default /usr/lib/libreoffice)
+##
+##          the IDL capp.py generates for python3/doobiedoo.py is written
+##          as doobiedoo.rdb in this directory by unoidl-write, resolving
+##          the types it names against LibreOffice's own type libraries
+##          the result is to be committed, with doobiedoo.txt unchanged
+##
+
+#   Copyright (C) 2012, 2016, NewForester
+#   Released under the terms of the GNU GPL v2
+
+liboroot=${1:-/usr/lib/libreoffice};
+here=$(cd "${0%/*}" > /dev/null && pwd);
+home=${here%/tests/reference};
+
+usage() { (sed -e "/^###/d" -e "/^##/!d" $0 && echo -e "\e[35m${0##*/}: \e[31m$@\e[0m") >&2; }
+
+writer="${liboroot}/sdk/bin/unoidl-write";
+if [[ ! -x "${writer}" ]]; then
+    usage "cannot find unoidl-write - suspect the SDK has not been installed";
+    exit 1;
+fi
+
+work=$(mktemp -d);
+trap "rm -fr ${work}" EXIT;
+
+# unoidl-write reads the types the IDL includes from the type libraries given
+# before it, so the includes are dropped
+
+python3 ${home}/python3/capp.py idl DoobieDoo ${home}/python3/doobiedoo.py > ${work}/XDoobieDoo.idl || exit 1;
+sed -i -e "/^#include/d" ${work}/XDoobieDoo.idl;
+
+"${writer}" ${liboroot}/program/types.rdb ${liboroot}/program/types/offapi.rdb ${work}/XDoobieDoo.idl ${here}/doobiedoo.rdb || exit 1;
+
+echo "wrote ${here}/doobiedoo.rdb";
+
+# EOF
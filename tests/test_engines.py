@@ -0,0 +1,162 @@
+'''
+Extraction Engine Tests
+
+capp.py has two engines that parse the Python source of an add-in into an
+AddIn model:  processInput, the original state machine, and scanInput, which
+is faster.  They must give the same models, or raise the same exceptions, for
+any source whatever.  These tests compare them on:
+
+    the example add-in  - python3/doobiedoo.py, for its class and for every class
+    synthetic add-ins   - sources of many methods, as bench/cappbench.py makes
+    mutated sources     - the example, and a source of two add-ins, with lines
+                          inserted, deleted and replaced at random, from a fixed
+                          seed, by lines of the kinds the engines look for
+
+Run them from the top directory of the repository with:
+
+    python3 -m unittest discover tests
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, io, json, random, unittest
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(here,'..','python3'))
+sys.path.insert(0,os.path.join(here,'..','bench'))
+
+import capp
+from cappbench import synthesise
+
+'''
+A source of two add-ins, and lines of the kinds the engines look for, with which to mutate sources
+'''
+twins = [
+    "'''\n",
+    "Twin add-ins in one file.\n",
+    "\n",
+    "moduleVersion = 2.00\n",
+    "publisherName = Twin Company\n",
+    "'''\n",
+    "\n",
+    "import uno, unohelper\n",
+    "from com.example.twins.Alpha import XAlpha\n",
+    "from com.example.twins.Beta import XBeta\n",
+    "\n",
+    'unoComponentId = "com.example.twins.Alpha.python.Alpha"\n',
+    "\n",
+    "class Alpha (unohelper.Base, XAlpha):\n",
+    "    def __init__ (self, ctx):\n",
+    "        self.ctx = ctx\n",
+    "\n",
+    "    def alphaTwice (self, x):\n",
+    '        """\n',
+    "        Doubles a number\n",
+    "            x - the number\n",
+    "        idl: double alphaTwice ([in] double x);\n",
+    "        cache: size=10\n",
+    '        """\n',
+    "        return 2 * x\n",
+    "\n",
+    'unoComponentId = "com.example.twins.Beta.python.Beta"\n',
+    "\n",
+    "class Beta (unohelper.Base, XBeta):\n",
+    "    def betaHalf (self, x):\n",
+    '        """\n',
+    "        Halves a number\n",
+    "            x - the number\n",
+    "        idl: double betaHalf ([in] double x);\n",
+    '        """\n',
+    "        return x / 2\n",
+]
+
+fragments = [
+    "class Foo (unohelper.Base, XFoo):\n",
+    "class Alpha (unohelper.Base, XAlpha):\n",
+    "class Plain:\n",
+    "from a.b import XFoo\n",
+    "from com.doobiecompany.examples.DoobieDoo import XDoobieDoo\n",
+    'unoComponentId = "x.y"\n',
+    "    def bar (self, a, b):\n",
+    "    def _hidden (self, a):\n",
+    '        """\n',
+    "        '''\n",
+    "'''\n",
+    "        idl: long bar ([in] long a);\n",
+    "        cache: size=3\n",
+    "    range: a as=numpy\n",
+    "   async: workers=2\n",
+    "        a - desc - more\n",
+    "        b - d\n",
+    "def f():\n",
+    "x = 1\n",
+    "moduleVersion = 2 = 3\n",
+    "publisherName = Someone\n",
+    "\n",
+]
+
+def model(engine,lines,moduleName):
+    '''
+    what the engine makes of the lines, as json, or the name of the exception it raises
+    '''
+    try:
+        result = engine(io.StringIO(''.join(lines)),moduleName,'source.py')
+    except Exception as error:
+        return 'raised ' + type(error).__name__
+    if isinstance(result,list):
+        return json.dumps([addIn.asDict() for addIn in result],sort_keys=True)
+    if result is None:
+        return None
+    return json.dumps(result.asDict(),sort_keys=True)
+
+def mutate(lines,generator):
+    '''
+    a copy of the lines with a few inserted, deleted or replaced at random
+    '''
+    lines = list(lines)
+    for dummy in range(generator.randint(1,6)):
+        choice = generator.random()
+        index = generator.randrange(len(lines) + 1)
+        if choice < 0.4:
+            lines.insert(index,generator.choice(fragments))
+        elif lines and choice < 0.7:
+            del lines[min(index,len(lines) - 1)]
+        elif lines:
+            lines[min(index,len(lines) - 1)] = generator.choice(fragments)
+    return lines
+
+class EngineTest(unittest.TestCase):
+    '''
+    processInput and scanInput make the same models
+    '''
+    def assertSame(self,lines,moduleNames):
+        for moduleName in moduleNames:
+            expected = model(capp.processInput,lines,moduleName)
+            self.assertEqual(model(capp.scanInput,lines,moduleName),expected,
+                             'the engines differ for %r on:\n%s' % (moduleName, ''.join(lines)))
+
+    def test_example(self):
+        with open(os.path.join(here,'..','python3','doobiedoo.py'),"r") as input:
+            lines = input.readlines()
+        self.assertIsNotNone(model(capp.processInput,lines,'DoobieDoo'))
+        self.assertSame(lines,['DoobieDoo', None, 'Nope'])
+
+    def test_synthetic(self):
+        for methods, prose in ((1, 0), (50, 3), (200, 0)):
+            self.assertSame(synthesise(methods,prose),['Synthetic', None])
+
+    def test_mutated(self):
+        with open(os.path.join(here,'..','python3','doobiedoo.py'),"r") as input:
+            example = input.readlines()
+        generator = random.Random(0)
+        for source, moduleNames in ((example, ['DoobieDoo', None, 'Foo']), (twins, ['Alpha', 'Beta', None])):
+            for dummy in range(1000):
+                self.assertSame(mutate(source,generator),moduleNames)
+
+if __name__ == '__main__':
+    unittest.main()
+
+# EOF
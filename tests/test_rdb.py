@@ -0,0 +1,261 @@
+'''
+Type Library Writer Tests
+
+These tests read back what rdb.py writes with a reader of their own, written
+from the description of the binary UNOIDL format in LibreOffice's
+unoidl/source/unoidlprovider.cxx rather than from rdb.py, and compare what
+it reads with what was meant to be written:
+
+    the example add-in  - the type library capp.py writes for doobiedoo.py is
+                          read and compared with tests/reference/doobiedoo.txt,
+                          written by hand from the IDL capp.py generates
+    round trips         - interfaces with every kind of type, parameter and
+                          exception rdb.py writes, in modules that share names
+    tool references     - every tests/reference/<name>.rdb, made by LibreOffice's
+                          unoidl-write, is read and compared with
+                          tests/reference/<name>.txt and, for doobiedoo, with
+                          what capp.py writes
+
+The reference type library of the example, tests/reference/doobiedoo.rdb, is
+built from the IDL capp.py generates by tests/reference/make-reference.sh,
+which needs LibreOffice and its SDK.  Until it is committed, the tool
+reference test is skipped.
+
+The reader writes what it reads as lines of text:  a module line for each
+module and an interface line, with its bases, for each interface, followed by
+a line for each method with its parameters and exceptions.  Types are given
+by their UNOIDL names, such as []double and com.sun.star.table.XCellRange.
+
+Run them from the top directory of the repository with:
+
+    python3 -m unittest discover tests
+'''
+
+'''
+    Copyright (C) 2012, 2016, NewForester
+    Released under the terms of the GNU GPL v2
+'''
+
+import sys, os, glob, struct, unittest
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(here,'..','python3'))
+
+import capp, rdb
+
+'''
+The reader
+'''
+_directions = {0: 'in', 1: 'out', 2: 'inout'}
+
+class RdbReader(object):
+    '''
+    read a type library into lines of text
+
+    Both versions of the format are read:  0, which is what rdb.py writes, and
+    1, which adds annotations.  Strings may be in place or at an offset.  Only
+    modules and interfaces without attributes are understood.
+    '''
+    def __init__(self,data):
+        if data[:7] != b'UNOIDL\xFF' or data[7:8] not in (b'\0', b'\1'):
+            raise ValueError('the type library does not start UNOIDL\\xFF')
+        self.data    = data
+        self.version = data[7]
+        self.lines   = []
+        self.readMap(self.read32(8),self.read32(12),'')
+
+    def read8(self,offset):
+        return self.data[offset]
+
+    def read32(self,offset):
+        return struct.unpack_from('<I',self.data,offset)[0]
+
+    def readName(self,offset):
+        end = self.data.index(b'\0',offset)
+        return self.data[offset:end].decode('ascii')
+
+    def readString(self,offset):
+        '''
+        the string at the offset and the offset of what follows
+        '''
+        value = self.read32(offset)
+        if value & 0x80000000:
+            length = value & 0x7FFFFFFF
+            return self.data[offset + 4:offset + 4 + length].decode('utf-8'), offset + 4 + length
+        length = self.read32(value)
+        if length & 0x80000000:
+            raise ValueError('the string at %d is neither in place nor at an offset' % offset)
+        return self.data[value + 4:value + 4 + length].decode('utf-8'), offset + 4
+
+    def readAnnotations(self,offset):
+        count = self.read32(offset)
+        offset += 4
+        for index in range(count):
+            offset = self.readString(offset)[1]
+        return offset
+
+    def readMap(self,offset,count,prefix):
+        names = [self.readName(self.read32(offset + 8 * index)) for index in range(count)]
+        if names != sorted(names):
+            raise ValueError('the map of %s is not sorted' % (prefix or 'the root'))
+        for index, name in enumerate(names):
+            self.readEntity(self.read32(offset + 8 * index + 4),prefix + name)
+
+    def readEntity(self,offset,name):
+        kind = self.read8(offset)
+        annotated = self.version > 0 and kind & 0x20
+        if kind & 0x1F == 0:
+            self.lines.append('module ' + name)
+            self.readMap(offset + 5,self.read32(offset + 1),name + '.')
+        elif kind & 0x1F == 5:
+            self.readInterface(offset + 1,name,annotated)
+        else:
+            raise ValueError('%s is of kind %d, which I do not read' % (name, kind & 0x1F))
+
+    def readInterface(self,offset,name,annotated):
+        if annotated:
+            offset = self.readAnnotations(offset)
+
+        bases = []
+        for optional in (False, True):
+            count = self.read32(offset)
+            offset += 4
+            for index in range(count):
+                base, offset = self.readString(offset)
+                bases.append('[optional] ' + base if optional else base)
+                if self.version > 0:
+                    offset = self.readAnnotations(offset)
+
+        if self.read32(offset):
+            raise ValueError('%s has attributes, which I do not read' % name)
+        offset += 4
+
+        self.lines.append('interface %s : %s' % (name, ', '.join(bases)))
+        methods = self.read32(offset)
+        offset += 4
+        for index in range(methods):
+            method, offset = self.readString(offset)
+            returnType, offset = self.readString(offset)
+            parameters = []
+            count = self.read32(offset)
+            offset += 4
+            for dummy in range(count):
+                direction = self.read8(offset)
+                parameterName, offset = self.readString(offset + 1)
+                parameterType, offset = self.readString(offset)
+                parameters.append('[%s] %s %s' % (_directions[direction], parameterType, parameterName))
+            exceptions = []
+            count = self.read32(offset)
+            offset += 4
+            for dummy in range(count):
+                exception, offset = self.readString(offset)
+                exceptions.append(exception)
+            if self.version > 0:
+                offset = self.readAnnotations(offset)
+            self.lines.append('    %s %s(%s)%s' % (returnType, method, ', '.join(parameters),
+                              ' raises (%s)' % ', '.join(exceptions) if exceptions else ''))
+
+def readRdb(data):
+    '''
+    the lines of text the type library reads as
+    '''
+    return RdbReader(data).lines
+
+def readReference(path):
+    with open(path,"r") as input:
+        return [line.rstrip('\n') for line in input if line.strip()]
+
+'''
+The tests
+'''
+class ExampleTest(unittest.TestCase):
+    '''
+    the type library of the example add-in
+    '''
+    def setUp(self):
+        self.model = capp.processFile(os.path.join(here,'..','python3','doobiedoo.py'),'DoobieDoo')
+
+    def test_reference(self):
+        self.assertEqual(readRdb(capp.rdbGenerate(self.model)),readReference(os.path.join(here,'reference','doobiedoo.txt')))
+
+    def test_deterministic(self):
+        self.assertEqual(capp.rdbGenerate(self.model),capp.rdbGenerate(self.model))
+
+class RoundTripTest(unittest.TestCase):
+    '''
+    interfaces written and read back
+    '''
+    def test_types(self):
+        methods = [
+            ('sum',    'double',                           [('in', 'sequence< sequence<double> >', 'cells')],         []),
+            ('count',  'unsigned hyper',                   [('in', 'com::sun::star::table::XCellRange', 'range')],    []),
+            ('swap',   'void',                             [('inout', 'any', 'a'), ('out', 'sequence<string>', 'b')], []),
+            ('check',  'boolean',                          [],                                                        ['com::sun::star::lang::IllegalArgumentException',
+                                                                                                                       '::com::sun::star::uno::RuntimeException']),
+            ('later',  'com::sun::star::sheet::XVolatileResult', [('in', 'short', 'n'), ('in', 'unsigned long', 'm')],    []),
+        ]
+        data = rdb.rdbBytes([rdb.Interface('com.example.Types.XTypes',methods)])
+        self.assertEqual(readRdb(data),[
+            'module com',
+            'module com.example',
+            'module com.example.Types',
+            'interface com.example.Types.XTypes : com.sun.star.uno.XInterface',
+            '    double sum([in] [][]double cells)',
+            '    unsigned hyper count([in] com.sun.star.table.XCellRange range)',
+            '    void swap([inout] any a, [out] []string b)',
+            '    boolean check() raises (com.sun.star.lang.IllegalArgumentException, com.sun.star.uno.RuntimeException)',
+            '    com.sun.star.sheet.XVolatileResult later([in] short n, [in] unsigned long m)',
+        ])
+
+    def test_modules(self):
+        interfaces = [
+            rdb.Interface('com.example.Two.XTwo',[('two', 'long', [], [])]),
+            rdb.Interface('com.example.One.XOne',[('one', 'long', [], [])]),
+            rdb.Interface('com.example.XTop',[]),
+            rdb.Interface('org.example.XOther',[('other', 'string', [('in', 'string', 's')], [])]),
+        ]
+        data = rdb.rdbBytes(interfaces)
+        self.assertEqual(readRdb(data),[
+            'module com',
+            'module com.example',
+            'module com.example.One',
+            'interface com.example.One.XOne : com.sun.star.uno.XInterface',
+            '    long one()',
+            'module com.example.Two',
+            'interface com.example.Two.XTwo : com.sun.star.uno.XInterface',
+            '    long two()',
+            'interface com.example.XTop : com.sun.star.uno.XInterface',
+            'module org',
+            'module org.example',
+            'interface org.example.XOther : com.sun.star.uno.XInterface',
+            '    string other([in] string s)',
+        ])
+        self.assertEqual(data,rdb.rdbBytes(list(reversed(interfaces))))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            rdb.typeName('XCellRange')
+        with self.assertRaises(ValueError):
+            rdb.rdbBytes([rdb.Interface('com.example.XOne',[]), rdb.Interface('com.example.XOne.XTwo',[])])
+
+class ToolReferenceTest(unittest.TestCase):
+    '''
+    type libraries made by the LibreOffice tools, if there are any in tests/reference
+    '''
+    def test_references(self):
+        paths = sorted(glob.glob(os.path.join(here,'reference','*.rdb')))
+        if not paths:
+            self.skipTest('there is no type library made by unoidl-write in tests/reference - run tests/reference/make-reference.sh')
+        example = ExampleTest('test_reference')
+        example.setUp()
+        for path in paths:
+            with open(path,"rb") as input:
+                lines = readRdb(input.read())
+            self.assertEqual(lines,readReference(os.path.splitext(path)[0] + '.txt'))
+            if os.path.basename(path) == 'doobiedoo.rdb':
+                self.assertEqual(lines,readRdb(capp.rdbGenerate(example.model)))
+
+if __name__ == '__main__':
+    unittest.main()
+
+# EOF